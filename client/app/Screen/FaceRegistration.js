@@ -28,6 +28,7 @@ const moderateScale = (size, factor = 0.5) =>
 export default function FaceRegistration() {
   const [permission, requestPermission] = useCameraPermissions();
   const [isLoading, setIsLoading] = useState(false);
+  const [loadingText, setLoadingText] = useState('Registering...');
   const [capturedImages, setCapturedImages] = useState([]);
   const [currentStep, setCurrentStep] = useState(0); // 0: intro, 1: capture, 2: complete
   const [isCapturing, setIsCapturing] = useState(false);
@@ -170,20 +171,33 @@ export default function FaceRegistration() {
       const imageData = capturedImages.map(img => img.base64);
       const response = await faceRecognitionService.registerFace(imageData);
 
-      if (response.success) {
-        Alert.alert(
-          'Success!',
-          'Face registration completed successfully. You can now use face recognition for login.',
-          [
-            {
-              text: 'Continue',
-              onPress: () => router.replace('/Screen/Main'),
-            },
-          ]
-        );
-      } else {
+      if (!response.success) {
         throw new Error(response.error || 'Registration failed');
       }
+
+      // Samples are saved; the face model is trained in the background
+      let message = 'Face registration completed successfully. You can now use face recognition for login.';
+      if (response.job_id) {
+        setLoadingText('Training...');
+        const job = await faceRecognitionService.waitForFaceJob(response.job_id);
+        if (job.status === 'failed') {
+          throw new Error(job.error || 'Face model training failed');
+        }
+        if (job.status !== 'done') {
+          message = 'Your face samples were saved and training is still in progress. Face recognition will be available in a few moments.';
+        }
+      }
+
+      Alert.alert(
+        'Success!',
+        message,
+        [
+          {
+            text: 'Continue',
+            onPress: () => router.replace('/Screen/Main'),
+          },
+        ]
+      );
     } catch (error) {
       console.error('Face registration error:', error);
       
@@ -211,6 +225,7 @@ export default function FaceRegistration() {
       );
     } finally {
       setIsLoading(false);
+      setLoadingText('Registering...');
     }
   };
 
@@ -541,7 +556,7 @@ export default function FaceRegistration() {
                           color="#f5f1e8"
                         />
                       </Animatable.View>
-                      <Text style={styles.submitButtonText}>Registering...</Text>
+                      <Text style={styles.submitButtonText}>{loadingText}</Text>
                     </View>
                   ) : (
                     <>
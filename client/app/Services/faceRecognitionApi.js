@@ -95,6 +95,27 @@ export const faceRecognitionService = {
     }
   },
 
+  /**
+   * Recognize a face from a short burst of frames in one request
+   * @param {Array<string>} images - Base64 encoded frames (at most 10)
+   * @returns {Promise} API response; processing stops once the frames agree
+   */
+  recognizeFaceBatch: async (images) => {
+    try {
+      const response = await faceAPI.post('/recognize/batch', { images });
+      console.log('Face batch recognition response:', response.data);
+      return response.data;
+    } catch (error) {
+      console.error('Face batch recognition error details:', {
+        message: error.message,
+        code: error.code,
+        status: error.response?.status,
+        data: error.response?.data
+      });
+      throw error;
+    }
+  },
+
   /**
    * Check if the current user has registered face data
    * @returns {Promise} API response
@@ -109,6 +130,38 @@ export const faceRecognitionService = {
     }
   },
 
+  /**
+   * Get the status of a background face training job
+   * @param {string} jobId - Job id returned by registerFace
+   * @returns {Promise} API response with status queued|running|done|failed
+   */
+  getFaceJob: async (jobId) => {
+    try {
+      const response = await faceAPI.get(`/jobs/${jobId}`);
+      return response.data;
+    } catch (error) {
+      console.error('Face job status error:', error);
+      throw error;
+    }
+  },
+
+  /**
+   * Poll a background face training job until it finishes
+   * @param {string} jobId - Job id returned by registerFace
+   * @param {number} timeoutMs - Give up waiting after this long
+   * @param {number} intervalMs - Delay between status checks
+   * @returns {Promise} Last job status; status is still queued|running if it timed out
+   */
+  waitForFaceJob: async (jobId, timeoutMs = 120000, intervalMs = 1500) => {
+    const deadline = Date.now() + timeoutMs;
+    let job = await faceRecognitionService.getFaceJob(jobId);
+    while ((job.status === 'queued' || job.status === 'running') && Date.now() < deadline) {
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+      job = await faceRecognitionService.getFaceJob(jobId);
+    }
+    return job;
+  },
+
   /**
    * Delete face data for the current user
    * @returns {Promise} API response
@@ -1,12 +1,19 @@
 from flask import request, jsonify
+import math
 import jwt
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone, timedelta
 from app.models.user_model import User
 from app.utils.validations import validate_login_data, validate_registration_data
+from app.utils.auth import SECRET_KEY, decode_token
+from app.utils.rate_limit import TokenBucketLimiter
+from app.services.password_hasher import HashingBusy
+from config import Config
 from functools import wraps
-import os
 
-SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'botibot_secret_key_2025')
+# Admission control applied before any password hashing
+ip_limiter = TokenBucketLimiter('auth.admission.ip', Config.LOGIN_IP_RATE, Config.LOGIN_IP_BURST)
+email_limiter = TokenBucketLimiter('auth.admission.email', Config.LOGIN_EMAIL_RATE, Config.LOGIN_EMAIL_BURST)
 
 def generate_token(user_id):
     """Generate a JWT token for the user"""
@@ -32,8 +39,8 @@ def token_required(f):
             return jsonify({'message': 'Token is missing!'}), 401
         
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.find_by_id(data['sub'])
+            data = decode_token(token)
+            current_user = User.find_cached(data['sub'])
             
             if not current_user:
                 return jsonify({'message': 'User not found!'}), 401
@@ -47,6 +54,23 @@ def token_required(f):
     
     return decorated
 
+def retry_response(message, status, retry_after):
+    """Error response telling the client when to retry"""
+    retry_after = max(1, math.ceil(retry_after))
+    return jsonify({'message': message, 'retry_after': retry_after}), status, {'Retry-After': str(retry_after)}
+
+def admit(email=None):
+    """Take an attempt from the client's IP bucket (and the email's); returns a 429 response if either is empty
+    
+    remote_addr is the client's address once TRUSTED_PROXY_HOPS is set for the proxies in front of the app.
+    """
+    retry_after = ip_limiter.acquire(request.remote_addr)
+    if not retry_after and email:
+        retry_after = email_limiter.acquire(email.strip().lower())
+    if retry_after:
+        return retry_response('Too many attempts, please try again later', 429, retry_after)
+    return None
+
 def register():
     if not request.is_json:
         return jsonify({'message': 'Missing JSON in request'}), 400
@@ -58,6 +82,10 @@ def register():
     if validation_errors:
         return jsonify({'message': 'Validation failed', 'errors': validation_errors}), 400
     
+    rejected = admit()
+    if rejected:
+        return rejected
+    
     # Check if user already exists
     existing_user = User.find_by_email(data['email'])
     if existing_user:
@@ -78,7 +106,13 @@ def register():
     }
     
     # Save user to database
-    user_id = User.create_user(user_data)
+    try:
+        user_id = User.create_user(user_data)
+    except HashingBusy as e:
+        return retry_response(str(e), 503, e.retry_after)
+    except DuplicateKeyError:
+        # Registered concurrently since the check above (users.email is unique)
+        return jsonify({'message': 'User with this email already exists'}), 409
     
     # Generate authentication token
     token = generate_token(user_id)
@@ -106,13 +140,21 @@ def login():
     if validation_errors:
         return jsonify({'message': 'Validation failed', 'errors': validation_errors}), 400
     
+    rejected = admit(data['email'])
+    if rejected:
+        return rejected
+    
     # Find user by email
     user = User.find_by_email(data['email'])
     if not user:
         return jsonify({'message': 'Invalid email or password'}), 401
     
     # Verify password
-    if not User.verify_password(user['password'], data['password']):
+    try:
+        password_ok = User.verify_password(user['password'], data['password'])
+    except HashingBusy as e:
+        return retry_response(str(e), 503, e.retry_after)
+    if not password_ok:
         return jsonify({'message': 'Invalid email or password'}), 401
     
     # Generate authentication token
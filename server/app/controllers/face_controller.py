@@ -1,8 +1,18 @@
-from flask import request, jsonify
-import jwt
-import os
-from app.services.face_recognition_service import FaceRecognitionService
+from flask import request, jsonify, g
+import time
+from config import Config
+from app.services.face_recognition_service import get_face_service
+from app.services.face_jobs import job_runner
+from app.services.face_compute import ComputeBusy
 from app.models.user_model import User
+from app.utils.auth import decode_token
+from app.utils.metrics import metrics, start_trace, end_trace, server_timing
+
+# Content types accepted as a single raw image request body
+RAW_IMAGE_TYPES = ('image/jpeg', 'image/png')
+
+# Most frames accepted by one batch recognition request
+MAX_BATCH_FRAMES = 10
 
 
 def get_current_user():
@@ -25,11 +35,10 @@ def get_current_user():
         return None
     
     try:
-        secret_key = os.getenv('JWT_SECRET_KEY', 'default_secret_key')
-        data = jwt.decode(token, secret_key, algorithms=['HS256'])
+        data = decode_token(token)
         user_id = data['sub']  # Use 'sub' to match auth controller
         print(f"Decoded user_id: {user_id}")  # Debug log
-        user = User.find_by_id(user_id)
+        user = User.find_cached(user_id)
         if user:
             print(f"Found user: {user.get('email', 'unknown')}")
         else:
@@ -40,6 +49,60 @@ def get_current_user():
         return None
 
 
+def start_face_request():
+    """Start timing a face API request and collecting its stage timings"""
+    g.face_request_start = time.perf_counter()
+    start_trace()
+
+
+def finish_face_request(response):
+    """Record the request latency and, when enabled, report stage timings in a Server-Timing header"""
+    stages = end_trace()
+    start = g.pop('face_request_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        metrics.observe(f"face.request.{(request.endpoint or 'unknown').split('.')[-1]}", elapsed)
+        stages.append(('total', elapsed * 1000))
+    
+    if Config.SERVER_TIMING and stages:
+        response.headers['Server-Timing'] = server_timing(stages)
+    return response
+
+
+def busy_response(e):
+    """503 telling the client when to retry because the face compute queue is full"""
+    response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+    return response, 503, {'Retry-After': str(e.retry_after)}
+
+
+def get_uploaded_images(field):
+    """Get images sent as multipart files, a raw image body or base64 JSON.
+    
+    Binary uploads are returned as bytes read straight from the request stream,
+    JSON uploads as the raw field value. Returns None if no images were sent.
+    """
+    if request.mimetype == 'multipart/form-data':
+        files = request.files.getlist(field)
+        return [f.stream.read() for f in files] if files else None
+    
+    if request.mimetype in RAW_IMAGE_TYPES:
+        body = request.get_data(cache=False)
+        return [body] if body else None
+    
+    data = request.get_json(silent=True)
+    if not data or field not in data:
+        return None
+    return data[field]
+
+
+def get_uploaded_image():
+    """Get a single image from a multipart, raw image or base64 JSON request"""
+    image = get_uploaded_images('image')
+    if isinstance(image, list):
+        return image[0] if len(image) == 1 else None
+    return image
+
+
 def register_face():
     """Register face samples for the authenticated user"""
     try:
@@ -48,13 +111,11 @@ def register_face():
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Get request data
-        data = request.get_json()
-        if not data or 'images' not in data:
+        # Get request data (multipart files or base64 JSON)
+        images = get_uploaded_images('images')
+        if not images:
             return jsonify({'error': 'Images are required'}), 400
         
-        images = data['images']
-        
         # Validate images
         if not isinstance(images, list):
             return jsonify({'error': 'Images must be an array'}), 400
@@ -65,20 +126,24 @@ def register_face():
         if len(images) > 30:
             return jsonify({'error': 'Maximum 30 images allowed'}), 400
         
-        # Initialize face recognition service
-        face_service = FaceRecognitionService()
+        # Get the shared face recognition service
+        face_service = get_face_service()
         
-        # Register face samples
-        result = face_service.register_face_samples(str(user['_id']), images)
+        # Register face samples; training runs as a background job
+        result = face_service.register_face_samples(str(user['_id']), images, background=True)
         
         return jsonify({
-            'message': f'Face registration completed successfully. {result["samples_saved"]} samples saved and model trained.',
+            'message': f'Face registration accepted. {result["samples_saved"]} samples saved; model training queued.',
             'success': True,
             'face_id': result['face_id'],
             'samples_saved': result['samples_saved'],
-            'results': result['results']
-        }), 200
+            'results': result['results'],
+            'job_id': result['job_id'],
+            'status_url': f'/api/face/jobs/{result["job_id"]}'
+        }), 202
         
+    except ComputeBusy as e:
+        return busy_response(e)
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -93,15 +158,13 @@ def recognize_face():
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Get request data
-        data = request.get_json()
-        if not data or 'image' not in data:
+        # Get request data (multipart file, raw image body or base64 JSON)
+        image = get_uploaded_image()
+        if not image:
             return jsonify({'error': 'Image is required'}), 400
         
-        image = data['image']
-        
-        # Initialize face recognition service
-        face_service = FaceRecognitionService()
+        # Get the shared face recognition service
+        face_service = get_face_service()
         
         # Recognize face
         result = face_service.recognize_face(image)
@@ -126,12 +189,105 @@ def recognize_face():
                 }
             }), 200
         
+    except ComputeBusy as e:
+        return busy_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Face recognition failed: {str(e)}'}), 500
+
+
+def recognize_face_batch():
+    """Recognize a face from a short burst of frames in one request"""
+    try:
+        # Get current user
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        # Get request data (multipart files or base64 JSON)
+        images = get_uploaded_images('images')
+        if not images:
+            return jsonify({'error': 'Images are required'}), 400
+        
+        # Validate images
+        if not isinstance(images, list):
+            return jsonify({'error': 'Images must be an array'}), 400
+        
+        if len(images) > MAX_BATCH_FRAMES:
+            return jsonify({'error': f'Maximum {MAX_BATCH_FRAMES} images allowed'}), 400
+        
+        # Get the shared face recognition service
+        face_service = get_face_service()
+        
+        # Recognize face, stopping as soon as the frames agree
+        result = face_service.recognize_faces(images)
+        
+        response = {
+            'message': 'Face recognized successfully' if result['recognized'] else 'Face not recognized',
+            'success': result['recognized'],
+            'confidence_data': {
+                'confidence': result['confidence'],
+                'accuracy': result['accuracy']
+            },
+            'frames': {
+                'total': result['frames_total'],
+                'processed': result['frames_processed'],
+                'faces_found': result['faces_found'],
+                'votes': result['votes'],
+                'errors': result['errors']
+            }
+        }
+        if result['recognized']:
+            response['recognized_user'] = result['user']
+        return jsonify(response), 200
+        
+    except ComputeBusy as e:
+        return busy_response(e)
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Face recognition failed: {str(e)}'}), 500
 
 
+def verify_face():
+    """Verify an uploaded image against the authenticated user's own face samples"""
+    try:
+        # Get current user
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        # Get request data (multipart file, raw image body or base64 JSON)
+        image = get_uploaded_image()
+        if not image:
+            return jsonify({'error': 'Image is required'}), 400
+        
+        # Get the shared face recognition service
+        face_service = get_face_service()
+        
+        # Verify face (1:1 against this user's samples only)
+        result = face_service.verify_face(user, image)
+        
+        return jsonify({
+            'message': 'Face verified successfully' if result['verified'] else 'Face does not match',
+            'success': result['verified'],
+            'verified': result['verified'],
+            'face_id': result['face_id'],
+            'confidence_data': {
+                'confidence': result['confidence'],
+                'accuracy': result['accuracy']
+            }
+        }), 200
+        
+    except ComputeBusy as e:
+        return busy_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Face verification failed: {str(e)}'}), 500
+
+
 def get_face_status():
     """Check if the authenticated user has registered face samples"""
     try:
@@ -140,8 +296,8 @@ def get_face_status():
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Initialize face recognition service
-        face_service = FaceRecognitionService()
+        # Get the shared face recognition service
+        face_service = get_face_service()
         
         # Check if user has face registered
         has_face = face_service.user_has_face_registered(str(user['_id']))
@@ -164,8 +320,8 @@ def delete_face_data():
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Initialize face recognition service
-        face_service = FaceRecognitionService()
+        # Get the shared face recognition service
+        face_service = get_face_service()
         
         # Delete user's face data
         face_service.delete_user_face_data(str(user['_id']))
@@ -178,4 +334,44 @@ def delete_face_data():
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Failed to delete face data: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to delete face data: {str(e)}'}), 500
+
+
+def get_face_job(job_id):
+    """Get the status (queued/running/done/failed) of a face training job"""
+    try:
+        # Get current user
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        job = job_runner.get(job_id)
+        if not job or job.get('owner') != str(user['_id']):
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({
+            'job_id': job['id'],
+            'type': job['type'],
+            'status': job['status'],
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at'],
+            'error': job['error']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get face job: {str(e)}'}), 500
+
+
+def get_training_stats():
+    """Get counters for queued, run and coalesced face model training requests"""
+    try:
+        # Get current user
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        return jsonify(get_face_service().trainer.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get training stats: {str(e)}'}), 500
\ No newline at end of file
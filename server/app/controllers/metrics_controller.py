@@ -0,0 +1,26 @@
+import hmac
+from flask import request, jsonify
+from app.utils.metrics import metrics
+from config import Config
+
+
+def scrape_authorized():
+    """True if the request carries the configured METRICS_TOKEN as a bearer token"""
+    if not Config.METRICS_TOKEN:
+        return False
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header[len('Bearer '):] if auth_header.startswith('Bearer ') else auth_header
+    return hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode())
+
+
+def get_metrics():
+    """Get latency histograms, counters and gauges collected by this worker process"""
+    if not Config.METRICS_TOKEN:
+        return jsonify({'error': 'Metrics are disabled; set METRICS_TOKEN to enable them'}), 404
+    if not scrape_authorized():
+        return jsonify({'error': 'A valid metrics token is required'}), 401
+    
+    try:
+        return jsonify(metrics.snapshot()), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to get metrics: {str(e)}'}), 500
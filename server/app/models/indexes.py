@@ -0,0 +1,65 @@
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from app.models.user_model import User
+from app.models.schedule_model import Schedule
+
+# Every collection the app queries, with the indexes declared on its model
+INDEX_REGISTRY = [
+    (User.get_collection, User.INDEXES),
+    (Schedule.get_collection, Schedule.INDEXES),
+    (Schedule.get_logs_collection, Schedule.LOG_INDEXES)
+]
+
+# Shapes of the hot queries, explained to make sure none of them scans a whole collection
+HOT_QUERIES = [
+    ('User.find_by_email', User.get_collection, {'email': 'probe@example.com'}, None),
+    ('User face_id lookup', User.get_collection, {'face_id': 1}, None),
+    ('Schedule.find_by_user', Schedule.get_collection, {'user_id': ObjectId()}, None),
+    ('Schedule.get_schedules_for_today', Schedule.get_collection,
+     {'user_id': ObjectId(), 'start_date': {'$lte': '9999-12-31'}}, None),
+    ('Schedule.get_logs_by_schedule', Schedule.get_logs_collection,
+     {'schedule_id': ObjectId()}, [('taken_at', -1)])
+]
+
+
+def ensure_indexes():
+    """Create any missing declared index; existing ones are left alone. Returns the number of failures."""
+    failures = 0
+    for get_collection, indexes in INDEX_REGISTRY:
+        collection = get_collection()
+        for index in indexes:
+            name = index.document['name']
+            try:
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                # e.g. duplicate emails already stored, or an index of that name with other options
+                failures += 1
+                print(f"❌ Could not create index {collection.name}.{name}: {e}")
+    if not failures:
+        print("✅ MongoDB indexes are in place")
+    return failures
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for key in ('inputStage', 'queryPlan'):
+            yield from _plan_stages(plan.get(key))
+        for child in plan.get('inputStages', []):
+            yield from _plan_stages(child)
+
+
+def check_query_plans():
+    """Explain the hot queries and warn about any that would scan a whole collection. Returns their names."""
+    scans = []
+    for name, get_collection, query, sort in HOT_QUERIES:
+        cursor = get_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        if 'COLLSCAN' in _plan_stages(winning_plan):
+            scans.append(name)
+            print(f"⚠️ {name} uses a collection scan; run ensure_indexes.py")
+    return scans
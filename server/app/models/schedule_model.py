@@ -1,8 +1,17 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from app.utils.db_connection import db_instance
 
 class Schedule:
+    # Indexes of the medication_schedules and medication_logs collections (applied by app/models/indexes.py)
+    INDEXES = [
+        IndexModel([('user_id', ASCENDING), ('start_date', ASCENDING)], name='user_id_start_date')
+    ]
+    LOG_INDEXES = [
+        IndexModel([('schedule_id', ASCENDING), ('taken_at', DESCENDING)], name='schedule_id_taken_at')
+    ]
+    
     @classmethod
     def get_collection(cls):
         """Get the medication_schedules collection"""
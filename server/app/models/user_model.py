@@ -1,9 +1,23 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from app.utils.db_connection import db_instance
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.cache import TTLCache
+from app.services.password_hasher import password_hasher
+from config import Config
 
 class User:
+    # Indexes of the users collection (applied by app/models/indexes.py)
+    INDEXES = [
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+        IndexModel([('face_id', ASCENDING)], name='face_id_unique', unique=True,
+                   partialFilterExpression={'face_id': {'$gt': 0}})
+    ]
+    
+    # Recently authenticated user documents by id, so protected calls skip the round trip
+    _cache = TTLCache('auth.user_cache', Config.AUTH_USER_CACHE_SIZE, Config.AUTH_USER_CACHE_TTL)
+    
     @classmethod
     def get_collection(cls):
         """Get the users collection"""
@@ -14,7 +28,7 @@ class User:
         """Create a new user in the database"""
         # Hash the password before storing
         if 'password' in user_data:
-            user_data['password'] = generate_password_hash(user_data['password'])
+            user_data['password'] = password_hasher.hash(user_data['password'])
         
         user_data['created_at'] = datetime.utcnow()
         user_data['updated_at'] = datetime.utcnow()
@@ -32,16 +46,105 @@ class User:
         """Find a user by ID"""
         return cls.get_collection().find_one({'_id': ObjectId(user_id)})
     
+    @classmethod
+    def find_cached(cls, user_id):
+        """Find a user by ID, served from the in-process cache when recently loaded"""
+        key = str(user_id)
+        hit, user = cls._cache.get(key)
+        if not hit:
+            user = cls.find_by_id(key)
+            if not user:
+                return None
+            cls._cache.set(key, user)
+        # Callers may modify the document they get
+        return dict(user)
+    
+    @classmethod
+    def invalidate_cache(cls, *user_ids):
+        """Drop cached documents after a user has been modified"""
+        for user_id in user_ids:
+            cls._cache.invalidate(str(user_id))
+    
     @classmethod
     def update_user(cls, user_id, update_data):
         """Update user information"""
         update_data['updated_at'] = datetime.utcnow()
-        return cls.get_collection().update_one(
+        result = cls.get_collection().update_one(
             {'_id': ObjectId(user_id)},
             {'$set': update_data}
         )
+        cls.invalidate_cache(user_id)
+        return result
+    
+    @classmethod
+    def unset_fields(cls, user_id, *fields):
+        """Remove fields from a user document"""
+        result = cls.get_collection().update_one(
+            {'_id': ObjectId(user_id)},
+            {
+                '$unset': {field: '' for field in fields},
+                '$set': {'updated_at': datetime.utcnow()}
+            }
+        )
+        cls.invalidate_cache(user_id)
+        return result
+    
+    @classmethod
+    def sync_face_id_counter(cls):
+        """Move the face ID counter past the highest face_id stored on any user"""
+        highest = cls.get_collection().find_one({'face_id': {'$gt': 0}}, {'face_id': 1}, sort=[('face_id', DESCENDING)])
+        db_instance.get_db().counters.update_one(
+            {'_id': 'face_id'},
+            {'$max': {'seq': highest['face_id'] if highest else 0}},
+            upsert=True
+        )
+    
+    @classmethod
+    def reserve_face_ids(cls, count=1):
+        """Atomically reserve `count` consecutive face IDs from the shared counter; returns the first one"""
+        counters = db_instance.get_db().counters
+        if counters.find_one({'_id': 'face_id'}) is None:
+            # First use: carry on after the IDs handed out before the counter existed
+            cls.sync_face_id_counter()
+        
+        counter = counters.find_one_and_update(
+            {'_id': 'face_id'},
+            {'$inc': {'seq': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter['seq'] - count + 1
+    
+    @classmethod
+    def claim_face_id(cls, user_id, attempts=5):
+        """Give a user a new face ID unless they already have one; returns (face_id, newly_assigned)"""
+        for _ in range(attempts):
+            face_id = cls.reserve_face_ids()
+            try:
+                result = cls.get_collection().update_one(
+                    {'_id': ObjectId(user_id), 'face_id': {'$not': {'$gt': 0}}},
+                    {'$set': {'face_id': face_id, 'updated_at': datetime.utcnow()}}
+                )
+            except DuplicateKeyError:
+                # IDs were set outside the counter; skip past all of them
+                cls.sync_face_id_counter()
+                continue
+            finally:
+                cls.invalidate_cache(user_id)
+            
+            if result.matched_count:
+                return face_id, True
+            
+            # A concurrent registration of the same user claimed one first
+            user = cls.find_by_id(user_id)
+            if not user:
+                raise ValueError("User not found")
+            if user.get('face_id'):
+                return user['face_id'], False
+        
+        raise ValueError("Could not assign a face ID, please try again")
     
     @classmethod
     def verify_password(cls, stored_password, provided_password):
         """Verify the provided password against the stored hash"""
-        return check_password_hash(stored_password, provided_password)
\ No newline at end of file
+        return password_hasher.verify(stored_password, provided_password)
\ No newline at end of file
@@ -2,21 +2,43 @@ from flask import Blueprint
 from app.controllers.face_controller import (
     register_face,
     recognize_face,
+    recognize_face_batch,
+    verify_face,
     get_face_status,
-    delete_face_data
+    delete_face_data,
+    get_face_job,
+    get_training_stats,
+    start_face_request,
+    finish_face_request
 )
 
 # Create blueprint for face recognition routes
 face_bp = Blueprint('face', __name__, url_prefix='/api/face')
 
+# Per-request latency and stage timings
+face_bp.before_request(start_face_request)
+face_bp.after_request(finish_face_request)
+
 # Register face samples
 face_bp.route('/register', methods=['POST'])(register_face)
 
 # Recognize face
 face_bp.route('/recognize', methods=['POST'])(recognize_face)
 
+# Recognize face from a burst of frames
+face_bp.route('/recognize/batch', methods=['POST'])(recognize_face_batch)
+
+# Verify face against the authenticated user's own samples
+face_bp.route('/verify', methods=['POST'])(verify_face)
+
 # Get face registration status
 face_bp.route('/status', methods=['GET'])(get_face_status)
 
 # Delete face data
-face_bp.route('/delete', methods=['DELETE'])(delete_face_data)
\ No newline at end of file
+face_bp.route('/delete', methods=['DELETE'])(delete_face_data)
+
+# Poll a background training job
+face_bp.route('/jobs/<job_id>', methods=['GET'])(get_face_job)
+
+# Coalesced training counters
+face_bp.route('/training', methods=['GET'])(get_training_stats)
\ No newline at end of file
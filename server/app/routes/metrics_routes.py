@@ -0,0 +1,8 @@
+from flask import Blueprint
+from app.controllers.metrics_controller import get_metrics
+
+# Create blueprint for metrics routes
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+# Latency histograms, counters and gauges
+metrics_bp.route('', methods=['GET'])(get_metrics)
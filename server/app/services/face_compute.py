@@ -0,0 +1,175 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import cv2
+from config import Config
+from app.services.face_detection import FaceDetector
+from app.utils.metrics import metrics, start_trace, end_trace
+
+
+class ComputeBusy(Exception):
+    """Raised when the face compute queue is full; retry after `retry_after` seconds"""
+    
+    def __init__(self, retry_after):
+        super().__init__("Face processing is busy, please retry shortly")
+        self.retry_after = retry_after
+
+
+# Per-process face detector, created lazily inside each pool worker
+_worker_detector = None
+
+
+def init_compute_worker():
+    """Pin OpenCV to one thread so N workers use N cores instead of N x cores"""
+    cv2.setNumThreads(1)
+
+
+def _get_worker_detector():
+    """Workers only decode and detect, so they get a bare FaceDetector rather than the whole service"""
+    global _worker_detector
+    if _worker_detector is None:
+        _worker_detector = FaceDetector(Config.FACE_DECODE_MAX_DIM)
+    return _worker_detector
+
+
+def extract_face_task(uploaded_image):
+    """Pool task: decode and detect one image, returning ((face_img, face_box), stage timings)"""
+    start_trace()
+    result = _get_worker_detector().extract_face(uploaded_image)
+    return result, end_trace()
+
+
+def extract_sample_task(uploaded_image):
+    """Pool task: like extract_face_task but the result is (face_img, face_box, error)"""
+    start_trace()
+    result = _get_worker_detector().extract_sample(uploaded_image)
+    return result, end_trace()
+
+
+class FaceComputePool:
+    """Process pool for CPU-heavy face work with a bounded number of queued tasks.
+    
+    At most `workers` tasks run and `queue_size` more wait. Work that does not
+    fit is rejected at once with ComputeBusy, so bursts of face traffic are
+    shed instead of tying up the request threads that serve the rest of the API.
+    If a worker dies mid-task the pool is replaced and the tasks it took down
+    fail with ComputeBusy as well.
+    """
+    
+    def __init__(self, workers, queue_size, retry_after=2, start_method='spawn'):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.retry_after = retry_after
+        self.start_method = start_method
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = None
+        
+        # Counters exposed through stats()
+        self.submitted = 0
+        self.rejected = 0
+        self.restarts = 0
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=init_compute_worker
+                )
+            return self._executor
+    
+    def _discard_executor(self, executor):
+        """Drop a broken executor so the next task starts a fresh pool (once, however many tasks saw it break)"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        metrics.increment('face.compute.restarts')
+        executor.shutdown(wait=False)
+    
+    def _reserve(self, count):
+        """Claim queue slots for count tasks, or raise ComputeBusy"""
+        with self._lock:
+            if self._in_flight + count > self.capacity:
+                self.rejected += 1
+                raise ComputeBusy(self.retry_after)
+            self._in_flight += count
+            self.submitted += count
+    
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+    
+    def _submit(self, func, arg):
+        """Submit a task; returns (executor, future)"""
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, arg)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for this and later tasks
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            future = executor.submit(func, arg)
+        future.add_done_callback(self._release)
+        return executor, future
+    
+    def _result(self, executor, future):
+        """Wait for a task's result; if its worker died, replace the pool and shed the request"""
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise ComputeBusy(self.retry_after)
+    
+    def run(self, func, arg):
+        """Run func(arg) in a worker process and return its result"""
+        self._reserve(1)
+        try:
+            executor, future = self._submit(func, arg)
+        except Exception:
+            self._release()
+            raise
+        return self._result(executor, future)
+    
+    def map(self, func, args):
+        """Run func over args in worker processes, all or nothing, keeping their order"""
+        args = list(args)
+        self._reserve(len(args))
+        futures = []
+        try:
+            for arg in args:
+                futures.append(self._submit(func, arg))
+        except Exception:
+            for _ in range(len(args) - len(futures)):
+                self._release()
+            raise
+        return [self._result(executor, future) for executor, future in futures]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'in_flight': self._in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'restarts': self.restarts
+            }
+
+
+def create_compute_pool():
+    """Build this server process's share of the face compute pool, or None when face work should stay on request threads"""
+    if Config.FACE_COMPUTE_WORKERS <= 0:
+        return None
+    # FACE_COMPUTE_WORKERS is the budget for the host, split between the server processes
+    workers = max(1, Config.FACE_COMPUTE_WORKERS // max(1, Config.WEB_CONCURRENCY))
+    return FaceComputePool(
+        workers,
+        Config.FACE_COMPUTE_QUEUE,
+        retry_after=Config.FACE_COMPUTE_RETRY_AFTER,
+        start_method=Config.FACE_COMPUTE_START_METHOD
+    )
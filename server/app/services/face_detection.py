@@ -0,0 +1,144 @@
+import base64
+import io
+import queue
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from PIL import Image
+from app.services.face_store import normalize_face
+from app.utils.metrics import metrics
+
+
+def check_image(image):
+    """Return an uploaded image if it is raw bytes or a base64 string, else raise ValueError"""
+    if not isinstance(image, (str, bytes, bytearray, memoryview)):
+        raise ValueError("Image must be raw image bytes or a base64 string")
+    return image
+
+
+class FaceDetector:
+    """Decodes uploaded images and finds the single face in each.
+    
+    It holds only Haar cascades and the decode size, so compute worker
+    processes use it on its own, without the database, model or thread pools
+    of FaceRecognitionService. detectMultiScale keeps per-call state on the
+    classifier, so concurrent detections borrow separate copies.
+    """
+    cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    
+    def __init__(self, decode_max_dim=0):
+        # Longest side images are decoded to before detection (0 keeps full resolution)
+        self.decode_max_dim = decode_max_dim
+        self._cascades = queue.SimpleQueue()
+        self._cascades.put(self._create_cascade())
+    
+    def decode_base64_image(self, base64_string):
+        """Decode base64 image string to a grayscale array and its scale (see decode_image_bytes)"""
+        try:
+            # Remove the data URL prefix if present
+            if ',' in base64_string:
+                base64_string = base64_string.split(',')[1]
+            
+            # Decode base64 to bytes
+            image_bytes = base64.b64decode(base64_string)
+        except Exception as e:
+            raise ValueError(f"Failed to decode image: {str(e)}")
+        
+        return self.decode_image_bytes(image_bytes)
+    
+    def decode_image_bytes(self, image_bytes):
+        """Decode encoded image bytes straight to grayscale at detection resolution.
+        
+        Returns (gray, scale) where scale maps decoded pixel coordinates back to
+        the original full-resolution image.
+        """
+        max_dim = self.decode_max_dim
+        
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            width, height = image.size
+            
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 in the DCT domain
+            # and emit luma only, instead of decoding full-resolution colour
+            if max_dim and max(width, height) > max_dim:
+                ratio = max_dim / max(width, height)
+                image.draft('L', (int(width * ratio), int(height * ratio)))
+            
+            gray = np.asarray(image.convert('L'))
+        except Exception as e:
+            raise ValueError(f"Failed to decode image: {str(e)}")
+        
+        # Formats without DCT scaling (PNG) or a coarse draft step still need resizing
+        if max_dim and max(gray.shape) > max_dim:
+            ratio = max_dim / max(gray.shape)
+            size = (max(1, round(gray.shape[1] * ratio)), max(1, round(gray.shape[0] * ratio)))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        
+        return gray, width / gray.shape[1]
+    
+    def decode_image(self, image):
+        """Decode an uploaded image given as raw bytes or a base64 string to (gray, scale)"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return self.decode_image_bytes(image)
+        return self.decode_base64_image(check_image(image))
+    
+    def _create_cascade(self):
+        """Load a Haar cascade classifier"""
+        return cv2.CascadeClassifier(self.cascade_path)
+    
+    @contextmanager
+    def _borrow_cascade(self):
+        """Check out a cascade classifier no other thread is using"""
+        try:
+            cascade = self._cascades.get_nowait()
+        except queue.Empty:
+            cascade = self._create_cascade()
+        try:
+            yield cascade
+        finally:
+            self._cascades.put(cascade)
+    
+    def locate_face(self, gray):
+        """Detect the single face in a grayscale image and return its (x, y, w, h) box"""
+        with self._borrow_cascade() as cascade:
+            faces = cascade.detectMultiScale(gray, 1.3, 5)
+        
+        if len(faces) == 0:
+            raise ValueError("No face detected in the image")
+        elif len(faces) > 1:
+            raise ValueError("Multiple faces detected. Please ensure only one face is visible")
+        
+        return tuple(int(v) for v in faces[0])
+    
+    def detect_face(self, image):
+        """Detect face in image and return the normalized face region"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        x, y, w, h = self.locate_face(gray)
+        
+        # Return the face region at the fixed size samples are stored at
+        return normalize_face(gray[y:y+h, x:x+w])
+    
+    @staticmethod
+    def scale_box(box, scale):
+        """Map a face box from decoded coordinates back to the full-resolution image"""
+        return [int(round(v * scale)) for v in box]
+    
+    def extract_face(self, uploaded_image):
+        """Decode an uploaded image and return (face_img, face_box): the normalized face and its full-resolution box"""
+        # Decode image (grayscale, reduced resolution)
+        with metrics.timer('face.decode'):
+            image, scale = self.decode_image(uploaded_image)
+        
+        # Detect and extract face
+        with metrics.timer('face.detect'):
+            x, y, w, h = self.locate_face(image)
+            face_img = normalize_face(image[y:y+h, x:x+w])
+        return face_img, self.scale_box((x, y, w, h), scale)
+    
+    def extract_sample(self, uploaded_image):
+        """extract_face() for a worker thread or process: returns (face_img, face_box, error)"""
+        try:
+            face_img, face_box = self.extract_face(uploaded_image)
+            return face_img, face_box, None
+        except Exception as e:
+            return None, None, str(e)
@@ -0,0 +1,657 @@
+import math
+import os
+import struct
+import zipfile
+import cv2
+import numpy as np
+from app.services.face_search import CoarseIndex, COARSE_MIN_ROWS
+
+
+# OpenCV LBPH defaults; the histogram index uses the same parameters so both
+# engines produce the same face_id/confidence for the same samples.
+LBPH_RADIUS = 1
+LBPH_NEIGHBORS = 8
+LBPH_GRID_X = 8
+LBPH_GRID_Y = 8
+
+# Version of the binary (.npz) histogram model layout: 1 stored normalized
+# float32 histograms, 2 stores the exact per-cell pattern counts
+MODEL_FORMAT_VERSION = 2
+
+
+def lbph_counts(face_img, radius=LBPH_RADIUS, neighbors=LBPH_NEIGHBORS,
+                grid_x=LBPH_GRID_X, grid_y=LBPH_GRID_Y):
+    """LBPH spatial histogram of a grayscale face as raw pattern counts, plus the pixels per cell"""
+    src = np.asarray(face_img, dtype=np.float32)
+    rows, cols = src.shape
+    height, width = rows - 2 * radius, cols - 2 * radius
+    center = src[radius:radius + height, radius:radius + width]
+    codes = np.zeros((height, width), dtype=np.int32)
+    
+    # Same float32 arithmetic as OpenCV's elbp so the codes match bit for bit
+    one = np.float32(1)
+    for n in range(neighbors):
+        x = np.float32(radius * math.cos(2.0 * math.pi * n / neighbors))
+        y = np.float32(-radius * math.sin(2.0 * math.pi * n / neighbors))
+        fx, fy = int(math.floor(x)), int(math.floor(y))
+        cx, cy = int(math.ceil(x)), int(math.ceil(y))
+        tx, ty = x - np.float32(fx), y - np.float32(fy)
+        
+        def shifted(dy, dx):
+            return src[radius + dy:radius + dy + height, radius + dx:radius + dx + width]
+        
+        t = ((one - tx) * (one - ty) * shifted(fy, fx) + tx * (one - ty) * shifted(fy, cx)
+             + (one - tx) * ty * shifted(cy, fx) + tx * ty * shifted(cy, cx))
+        bit = (t > center) | (np.abs(t - center) < np.finfo(np.float32).eps)
+        codes |= bit.astype(np.int32) << n
+    
+    # Split into grid cells and histogram every cell in one bincount
+    patterns = 2 ** neighbors
+    cell_h, cell_w = height // grid_y, width // grid_x
+    cells = codes[:cell_h * grid_y, :cell_w * grid_x]
+    cells = cells.reshape(grid_y, cell_h, grid_x, cell_w).transpose(0, 2, 1, 3)
+    cells = cells.reshape(grid_y * grid_x, cell_h * cell_w)
+    offsets = (np.arange(grid_y * grid_x, dtype=np.int32) * patterns)[:, None]
+    hist = np.bincount((cells + offsets).ravel(), minlength=patterns * grid_x * grid_y)
+    return hist, cell_h * cell_w
+
+
+def lbph_histogram(face_img, **params):
+    """Compute the OpenCV-compatible LBPH spatial histogram of a grayscale face"""
+    counts, cell_area = lbph_counts(face_img, **params)
+    return counts.astype(np.float32) / np.float32(cell_area)
+
+
+def count_dtype(cell_area):
+    """Smallest unsigned type that holds a pattern count of one cell"""
+    return np.uint8 if cell_area <= np.iinfo(np.uint8).max else np.uint16
+
+
+def infer_cell_area(histograms):
+    """Pixels per cell of normalized LBPH histograms, whose values are multiples of 1 / cell area"""
+    smallest = np.min(histograms, where=histograms > 0, initial=np.inf)
+    if not np.isfinite(smallest) or smallest < 1 / np.iinfo(np.uint16).max:
+        return None
+    return int(round(1 / smallest))
+
+
+def histogram_counts(histograms, cell_area):
+    """Recover the exact pattern counts behind normalized LBPH histograms.
+    
+    Raises ValueError if they are not all histograms of cell_area-pixel cells,
+    e.g. a legacy model trained on face crops of different sizes.
+    """
+    scaled = np.asarray(histograms, dtype=np.float32) * np.float32(cell_area)
+    counts = np.rint(scaled)
+    if len(counts) and np.abs(scaled - counts).max() > 1e-2:
+        raise ValueError(f"Histograms are not all LBPH histograms of {cell_area}-pixel cells; "
+                         "the faces they were computed from had different sizes")
+    return counts.astype(count_dtype(cell_area))
+
+
+def chi_square_distances(histograms, probe, row_sums=None, chunk_rows=64):
+    """Chi-square (OpenCV HISTCMP_CHISQR_ALT) distance from probe to every row.
+    
+    Uses (a - b)^2 / (a + b) = a + b - 4ab / (a + b), so only the columns where
+    the (sparse) probe is non-zero need the division; the rest of each row
+    only contributes its sum, which callers may pass as row_sums (one value
+    or one per row). Rows are processed in small chunks through preallocated
+    buffers that stay in cache.
+    """
+    columns = np.flatnonzero(probe)
+    probe_values = np.asarray(probe, dtype=np.float32)[columns]
+    distances = np.empty(len(histograms), dtype=np.float32)
+    buffer_rows = min(chunk_rows, len(histograms))
+    gathered = np.empty((buffer_rows, len(columns)), dtype=histograms.dtype)
+    products = np.empty((buffer_rows, len(columns)), dtype=np.float32)
+    totals = np.empty_like(products)
+    
+    for start in range(0, len(histograms), chunk_rows):
+        chunk = histograms[start:start + chunk_rows]
+        rows = len(chunk)
+        np.take(chunk, columns, axis=1, out=gathered[:rows])
+        np.add(gathered[:rows], probe_values, out=totals[:rows])
+        np.multiply(gathered[:rows], probe_values, out=products[:rows])
+        np.divide(products[:rows], totals[:rows], out=products[:rows])
+        if row_sums is None:
+            sums = chunk.sum(axis=1, dtype=np.float32)
+        elif np.ndim(row_sums):
+            sums = row_sums[start:start + rows]
+        else:
+            sums = row_sums
+        distances[start:start + rows] = sums - 4 * products[:rows].sum(axis=1)
+    
+    distances += probe_values.sum()
+    distances *= 2
+    # Rounding can leave identical histograms slightly below zero
+    return np.maximum(distances, 0, out=distances)
+
+
+class LBPHEngine:
+    """OpenCV LBPHFaceRecognizer backend.
+    
+    OpenCV cannot look up one label's histograms, so verify() uses a copy of
+    them grouped by label, stored as pattern counts (a quarter of OpenCV's own
+    float32 copy). It is built whenever the model is trained, updated or
+    loaded, before the engine is published, never on a request. Every worker
+    process still holds its own model and copy; the index engine with
+    FACE_MODEL_MMAP shares one between processes.
+    """
+    name = 'lbph'
+    can_remove = False
+    # OpenCV can only copy a model through a full YAML write and parse, which costs more than retraining
+    can_copy = False
+    model_file = 'face_trainer.yml'
+    
+    def __init__(self):
+        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        self._label_histograms = {}
+        self._cell_area = None
+    
+    def _group_histograms(self):
+        """Copy the model's histograms into one matrix per label for verify()"""
+        self._label_histograms, self._cell_area = {}, None
+        histograms = self.recognizer.getHistograms()
+        if not histograms:
+            return
+        
+        matrix = np.vstack(histograms)
+        cell_area = infer_cell_area(matrix)
+        if cell_area is not None:
+            try:
+                matrix, self._cell_area = histogram_counts(matrix, cell_area), cell_area
+            except ValueError:
+                # Legacy model of faces of different sizes: keep the normalized histograms
+                pass
+        
+        labels = self.recognizer.getLabels().ravel()
+        order = np.argsort(labels, kind='stable')
+        values, starts = np.unique(labels[order], return_index=True)
+        for value, rows in zip(values, np.split(order, starts[1:])):
+            self._label_histograms[int(value)] = matrix[rows]
+    
+    def train(self, faces, labels):
+        self.recognizer.train(faces, np.asarray(labels, dtype=np.int32))
+        self._group_histograms()
+    
+    def update(self, faces, labels):
+        self.recognizer.update(faces, np.asarray(labels, dtype=np.int32))
+        self._group_histograms()
+    
+    def remove(self, label):
+        """LBPH cannot forget histograms; callers must retrain instead"""
+        return False
+    
+    def has_label(self, label):
+        labels = self.recognizer.getLabels()
+        return labels is not None and label in labels
+    
+    def predict(self, face_img):
+        return self.recognizer.predict(face_img)
+    
+    def verify(self, face_img, label):
+        """Smallest distance from the probe to one label's samples, or None if the label is unknown"""
+        histograms = self._label_histograms.get(int(label))
+        if histograms is None:
+            return None
+        probe = lbph_histogram(face_img)
+        if self._cell_area is None:
+            return float(chi_square_distances(histograms, probe).min())
+        
+        # Chi-square scales linearly, so compare on the count scale and scale back
+        scale = np.float32(self._cell_area)
+        return float(chi_square_distances(histograms, probe * scale).min() / scale)
+    
+    def load(self, path):
+        self.recognizer.read(path)
+        self._group_histograms()
+    
+    def save(self, path):
+        self.recognizer.save(path)
+
+
+class HistogramIndexEngine:
+    """LBPH histograms held in one contiguous NumPy matrix.
+    
+    Rows are appended on enrollment and masked on removal, and prediction is
+    a single vectorized chi-square scan over the active rows. Rows hold the
+    exact per-cell pattern counts (uint8 for faces of up to 255 pixels per
+    cell), a quarter of the memory traffic of float32 histograms, and
+    distances are scaled back so they equal LBPHEngine's. Models are stored
+    as a binary .npz of raw arrays; .yml paths use OpenCV's LBPH layout
+    instead, which is interchangeable with LBPHEngine.
+    
+    With mmap=True the histogram matrix of a binary model is mapped read-only
+    from the file, so every worker process on a host shares one copy through
+    the page cache. The first in-place change copies it into private memory.
+    
+    With search='coarse' and at least coarse_min_rows rows, prediction first
+    ranks users in a reduced CoarseIndex space and computes exact chi-square
+    distances only for the rows of the best `candidates` users. The coarse
+    index is fitted when the model is saved and stored alongside it.
+    """
+    name = 'index'
+    can_remove = True
+    can_copy = True
+    model_file = 'face_model.npz'
+    
+    def __init__(self, mmap=False, search='exact', candidates=10, probes=32, coarse_min_rows=COARSE_MIN_ROWS):
+        if search not in ('exact', 'coarse'):
+            raise ValueError(f"Unknown face search mode: {search}")
+        self.mmap = mmap
+        self.search = search
+        self.candidates = max(1, candidates)
+        self.probes = max(1, probes)
+        self.coarse_min_rows = coarse_min_rows
+        self._reset()
+    
+    def _reset(self, cell_area=None):
+        self._cell_area = cell_area
+        self._histograms = np.empty((0, LBPH_GRID_X * LBPH_GRID_Y * 2 ** LBPH_NEIGHBORS),
+                                    dtype=count_dtype(cell_area or 0))
+        self._labels = np.empty(0, dtype=np.int32)
+        self._active = np.empty(0, dtype=bool)
+        self._size = 0
+        self._rows = {}
+        self._reset_coarse(None)
+    
+    def _reset_coarse(self, coarse):
+        """Attach a coarse index (or None) with empty per-row projections"""
+        self._coarse = coarse
+        dims = coarse.components.shape[0] if coarse is not None else 0
+        self._projected = np.empty((len(self._labels), dims), dtype=np.float32)
+        self._cells = np.empty(len(self._labels), dtype=np.int32)
+        self._cell_lists = None
+    
+    def _check_cell_area(self, cell_area):
+        """Adopt the cell size of the first rows; every later row and probe must match it"""
+        if self._cell_area is None:
+            self._reset(cell_area)
+        elif cell_area != self._cell_area:
+            raise ValueError(f"Face model uses {self._cell_area}-pixel LBPH cells, got {cell_area}; "
+                             "all face samples must have the same size")
+    
+    @property
+    def _row_sum(self):
+        """Every row sums to (cells x pixels per cell)"""
+        return np.float32(LBPH_GRID_X * LBPH_GRID_Y * self._cell_area)
+    
+    def __len__(self):
+        return int(self._active[:self._size].sum())
+    
+    def _reserve(self, extra):
+        """Grow the backing arrays geometrically so appends are amortized O(1)"""
+        needed = self._size + extra
+        if needed <= len(self._labels):
+            return
+        capacity = max(needed, 2 * len(self._labels), 64)
+        histograms = np.empty((capacity, self._histograms.shape[1]), dtype=self._histograms.dtype)
+        histograms[:self._size] = self._histograms[:self._size]
+        labels = np.empty(capacity, dtype=np.int32)
+        labels[:self._size] = self._labels[:self._size]
+        active = np.zeros(capacity, dtype=bool)
+        active[:self._size] = self._active[:self._size]
+        projected = np.empty((capacity, self._projected.shape[1]), dtype=np.float32)
+        projected[:self._size] = self._projected[:self._size]
+        cells = np.empty(capacity, dtype=np.int32)
+        cells[:self._size] = self._cells[:self._size]
+        self._histograms, self._labels, self._active = histograms, labels, active
+        self._projected, self._cells = projected, cells
+    
+    def add_histograms(self, histograms, labels, cell_area=None):
+        """Append normalized LBPH histogram rows (their cell size is inferred unless given)"""
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(len(labels), -1)
+        if not len(labels):
+            return
+        cell_area = cell_area or self._cell_area or infer_cell_area(histograms)
+        if cell_area is None:
+            raise ValueError("Histograms are not normalized LBPH histograms")
+        self._check_cell_area(cell_area)
+        self._append_counts(histogram_counts(histograms, self._cell_area), labels)
+    
+    def _append_counts(self, counts, labels, projected=None, cells=None):
+        """Append pattern count rows (and their coarse projections, if already known)"""
+        self._reserve(len(labels))
+        
+        start = self._size
+        self._histograms[start:start + len(labels)] = counts
+        self._labels[start:start + len(labels)] = labels
+        self._active[start:start + len(labels)] = True
+        if self._coarse is not None:
+            if projected is None:
+                projected = self._coarse.project(counts)
+                cells = self._coarse.assign(projected)
+            self._projected[start:start + len(labels)] = projected
+            self._cells[start:start + len(labels)] = cells
+            self._cell_lists = None
+        self._size += len(labels)
+        
+        for row, label in enumerate(labels, start):
+            self._rows.setdefault(int(label), []).append(row)
+    
+    def train(self, faces, labels):
+        self._reset()
+        self.update(faces, labels)
+    
+    def update(self, faces, labels):
+        counts = []
+        for face in faces:
+            face_counts, cell_area = lbph_counts(face)
+            self._check_cell_area(cell_area)
+            counts.append(face_counts)
+        if counts:
+            self._append_counts(np.stack(counts), labels)
+    
+    def _probe_counts(self, face_img):
+        counts, cell_area = lbph_counts(face_img)
+        self._check_cell_area(cell_area)
+        return counts.astype(np.float32)
+    
+    def remove(self, label):
+        """Mask every row of a label"""
+        rows = self._rows.pop(int(label), None)
+        if rows:
+            self._active[rows] = False
+        return True
+    
+    def has_label(self, label):
+        return int(label) in self._rows
+    
+    def predict(self, face_img):
+        if not self._rows:
+            return -1, float('inf')
+        return self._predict_counts(self._probe_counts(face_img))
+    
+    def predict_histogram(self, probe):
+        """(label, distance) of the nearest row to a precomputed normalized probe histogram"""
+        if not self._rows:
+            return -1, float('inf')
+        return self._predict_counts(np.asarray(probe, dtype=np.float32) * np.float32(self._cell_area))
+    
+    def _distances(self, rows, probe):
+        """Chi-square distances of count rows to a count probe, on the normalized histogram scale"""
+        return chi_square_distances(rows, probe, self._row_sum) / np.float32(self._cell_area)
+    
+    def _predict_counts(self, probe):
+        if self.search == 'coarse' and self._coarse is not None and self._size >= self.coarse_min_rows:
+            result = self._coarse_predict(probe)
+            if result is not None:
+                return result
+        
+        # Scan the whole matrix in place and rule out masked rows afterwards
+        distances = self._distances(self._histograms[:self._size], probe)
+        distances[~self._active[:self._size]] = np.inf
+        best = int(np.argmin(distances))
+        return int(self._labels[best]), float(distances[best])
+    
+    def _cell_index(self):
+        """Rows grouped by coarse cell (inverted lists), built once per model"""
+        if self._cell_lists is None:
+            order = np.argsort(self._cells[:self._size], kind='stable')
+            bounds = np.searchsorted(self._cells[order], np.arange(len(self._coarse.centroids) + 1))
+            self._cell_lists = (order, bounds)
+        return self._cell_lists
+    
+    def _coarse_predict(self, probe):
+        """Exact chi-square over the best candidate users from the nearest coarse cells"""
+        query = self._coarse.project(probe)[0]
+        order, bounds = self._cell_index()
+        rows = np.concatenate([order[bounds[cell]:bounds[cell + 1]]
+                               for cell in self._coarse.nearest_cells(query, self.probes)])
+        rows = rows[self._active[rows]]
+        if not len(rows):
+            return None
+        
+        # Rank users by the mean projected distance of their rows in these cells: one noisy
+        # sample close to the query is a much weaker hint than all of them
+        coarse_distances = ((self._projected[rows] - query) ** 2).sum(axis=1)
+        labels, owners = np.unique(self._labels[rows], return_inverse=True)
+        mean_distances = np.bincount(owners, coarse_distances) / np.bincount(owners)
+        labels = labels[np.argsort(mean_distances)[:self.candidates]]
+        
+        rows = np.concatenate([self._rows[int(label)] for label in labels])
+        distances = self._distances(self._histograms[rows], probe)
+        best = int(np.argmin(distances))
+        return int(self._labels[rows[best]]), float(distances[best])
+    
+    def fit_coarse(self, **options):
+        """Fit a new coarse index on the active rows and project every row into it"""
+        self.compact()
+        coarse = CoarseIndex.fit(self._histograms[:self._size], **options)
+        projected = coarse.project(self._histograms[:self._size])
+        cells = coarse.assign(projected)
+        self._reset_coarse(coarse)
+        self._projected[:self._size] = projected
+        self._cells[:self._size] = cells
+    
+    def _coarse_outgrown(self):
+        """True when coarse search is enabled and the index is missing or has far too few cells"""
+        if self.search != 'coarse' or self._size < self.coarse_min_rows:
+            return False
+        if self._coarse is None:
+            return True
+        return len(self._coarse.centroids) < min(4096, np.sqrt(self._size)) / 2
+    
+    def verify(self, face_img, label):
+        """Smallest distance from the probe to one label's rows, or None if the label is unknown"""
+        rows = self._rows.get(int(label))
+        if not rows:
+            return None
+        return float(self._distances(self._histograms[rows], self._probe_counts(face_img)).min())
+    
+    def compact(self):
+        """Drop masked rows from the backing arrays"""
+        active = np.flatnonzero(self._active[:self._size])
+        if len(active) == self._size:
+            return
+        counts, labels = self._histograms[active], self._labels[active]
+        coarse, projected, cells = self._coarse, self._projected[active], self._cells[active]
+        self._reset(self._cell_area)
+        self._reset_coarse(coarse)
+        if len(labels):
+            self._append_counts(counts, labels, projected, cells)
+    
+    def copy(self):
+        """Independent copy for copy-on-write updates; a mapped matrix stays shared until the copy appends"""
+        engine = HistogramIndexEngine.__new__(HistogramIndexEngine)
+        engine.__dict__.update(self.__dict__)
+        if not self.shared:
+            engine._histograms = self._histograms.copy()
+        engine._labels = self._labels.copy()
+        engine._active = self._active.copy()
+        engine._projected = self._projected.copy()
+        engine._cells = self._cells.copy()
+        engine._rows = {label: list(rows) for label, rows in self._rows.items()}
+        return engine
+    
+    @property
+    def shared(self):
+        """True while the histogram matrix is a read-only mapping of the model file"""
+        return isinstance(self._histograms, np.memmap)
+    
+    def load(self, path):
+        self._reset()
+        
+        if path.endswith('.npz'):
+            counts, labels, cell_area, coarse = read_binary_model(path, mmap=self.mmap)
+            if cell_area is None:
+                # Format 1 model of normalized histograms; its coarse index is refitted on the next save
+                self.add_histograms(counts, labels)
+                return
+            self._reset(cell_area)
+            if not isinstance(counts, np.memmap):
+                self._append_counts(counts, labels)
+                self._load_coarse(coarse)
+                return
+            
+            # Use the mapping as the backing matrix; _reserve() copies it on the first append
+            self._histograms = counts
+            self._labels = np.array(labels, dtype=np.int32)
+            self._active = np.ones(len(labels), dtype=bool)
+            self._size = len(labels)
+            for row, label in enumerate(self._labels):
+                self._rows.setdefault(int(label), []).append(row)
+            self._load_coarse(coarse)
+            return
+        
+        histograms, labels = read_yaml_model(path)
+        self.add_histograms(histograms, labels)
+    
+    def _load_coarse(self, arrays):
+        """Attach a stored coarse index; rows written without one are projected on the first save"""
+        self._reset_coarse(None)
+        coarse = CoarseIndex.from_arrays(arrays)
+        if coarse is None or len(arrays['coarse_cells']) != self._size:
+            return
+        self._reset_coarse(coarse)
+        self._projected = np.array(arrays['coarse_projected'], dtype=np.float32)
+        self._cells = np.array(arrays['coarse_cells'], dtype=np.int32)
+    
+    def save(self, path):
+        """Write the active rows as a binary .npz, or in OpenCV's LBPH YAML layout for .yml paths"""
+        self.compact()
+        
+        if path.endswith('.npz'):
+            if self._coarse_outgrown():
+                self.fit_coarse()
+            coarse = {}
+            if self._coarse is not None:
+                coarse = self._coarse.to_arrays()
+                coarse['coarse_projected'] = self._projected[:self._size]
+                coarse['coarse_cells'] = self._cells[:self._size]
+            write_binary_model(path, self._histograms[:self._size], self._labels[:self._size],
+                               self._cell_area or 0, **coarse)
+            return
+        
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+        fs.startWriteStruct('opencv_lbphfaces', cv2.FILE_NODE_MAP)
+        fs.write('threshold', float(np.finfo(np.float64).max))
+        fs.write('radius', LBPH_RADIUS)
+        fs.write('neighbors', LBPH_NEIGHBORS)
+        fs.write('grid_x', LBPH_GRID_X)
+        fs.write('grid_y', LBPH_GRID_Y)
+        fs.startWriteStruct('histograms', cv2.FILE_NODE_SEQ)
+        for row in range(self._size):
+            fs.write('', self._histograms[row:row + 1].astype(np.float32) / np.float32(self._cell_area))
+        fs.endWriteStruct()
+        fs.write('labels', self._labels[:self._size].reshape(-1, 1))
+        fs.startWriteStruct('labelsInfo', cv2.FILE_NODE_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+        fs.release()
+
+
+def read_yaml_model(path):
+    """Read (histograms, labels) from an OpenCV LBPH YAML trainer file"""
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(path)
+    histograms = recognizer.getHistograms()
+    if not histograms:
+        return np.empty((0, LBPH_GRID_X * LBPH_GRID_Y * 2 ** LBPH_NEIGHBORS), dtype=np.float32), np.empty(0, dtype=np.int32)
+    return np.vstack(histograms), recognizer.getLabels().ravel()
+
+
+def map_npz_array(path, name):
+    """Memory-map one array of an uncompressed .npz read-only, without reading it"""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{name} is compressed and cannot be memory-mapped")
+        
+        # Size of the .npy header inside the member
+        with archive.open(info) as member:
+            version = np.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(member)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(member)
+            npy_header_size = member.tell()
+    
+    # Size of the zip local file header in front of the member data
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+    name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+    offset = info.header_offset + 30 + name_length + extra_length + npy_header_size
+    
+    if not shape or 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+def read_binary_model(path, mmap=False):
+    """Read (counts, labels, cell area, coarse index arrays) from a binary .npz model, optionally mapping the counts.
+    
+    Format 1 models hold normalized float32 histograms instead of counts; they
+    are returned with a cell area of None and no coarse index (it was fitted
+    on the other scale).
+    """
+    with np.load(path, allow_pickle=False) as model:
+        params = model['params']
+        version = int(model['version'])
+        if version not in (1, MODEL_FORMAT_VERSION):
+            raise ValueError(f"Unsupported face model format version {version}")
+        if tuple(params) != (LBPH_RADIUS, LBPH_NEIGHBORS, LBPH_GRID_X, LBPH_GRID_Y):
+            raise ValueError(f"Face model was built with different LBPH parameters {tuple(params)}")
+        labels = model['labels']
+        if version == 1:
+            return model['histograms'], labels, None, {}
+        histograms = map_npz_array(path, 'histograms') if mmap else model['histograms']
+        cell_area = int(model['cell_area']) or None
+        coarse = {name: model[name] for name in model.files if name.startswith('coarse_')}
+    return histograms, labels, cell_area, coarse
+
+
+def write_binary_model(path, counts, labels, cell_area, **coarse):
+    """Write pattern counts, labels, LBPH parameters and any coarse index arrays as an uncompressed .npz"""
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            version=np.int32(MODEL_FORMAT_VERSION),
+            params=np.array([LBPH_RADIUS, LBPH_NEIGHBORS, LBPH_GRID_X, LBPH_GRID_Y], dtype=np.int32),
+            cell_area=np.int32(cell_area),
+            labels=np.ascontiguousarray(labels, dtype=np.int32),
+            histograms=np.ascontiguousarray(counts),
+            **coarse
+        )
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def convert_yaml_model(yaml_path, npz_path):
+    """Convert an OpenCV LBPH YAML trainer file to the binary model format; returns the sample count"""
+    histograms, labels = read_yaml_model(yaml_path)
+    if not len(labels):
+        raise ValueError(f"{yaml_path} holds no face samples")
+    cell_area = infer_cell_area(histograms)
+    if cell_area is None:
+        raise ValueError(f"{yaml_path} does not hold normalized LBPH histograms")
+    
+    # Models trained on unnormalized crops mix cell sizes and can only be rebuilt from the samples
+    counts = histogram_counts(histograms, cell_area)
+    
+    # Write then rename so a running worker never loads a partial file
+    tmp_path = f"{os.path.splitext(npz_path)[0]}.tmp-{os.getpid()}.npz"
+    try:
+        write_binary_model(tmp_path, counts, labels, cell_area)
+        os.replace(tmp_path, npz_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(labels)
+
+
+ENGINES = {
+    LBPHEngine.name: LBPHEngine,
+    HistogramIndexEngine.name: HistogramIndexEngine,
+}
+
+
+def create_engine(name, **options):
+    """Create a recognizer engine by name ('lbph' or 'index')"""
+    try:
+        engine_class = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown face recognition engine: {name}")
+    return engine_class(**options)
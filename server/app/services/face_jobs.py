@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+
+
+class FaceJobRunner:
+    """Status of face model jobs, whose work is run by the TrainingCoordinator.
+    
+    Job status is kept in memory and mirrored to a small JSON file per job so
+    any worker process on the same host can answer status polls.
+    """
+    
+    def __init__(self, jobs_path=None, max_jobs=1000):
+        self.jobs_path = jobs_path or Config.FACE_JOBS_PATH
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _job_file(self, job_id):
+        return os.path.join(self.jobs_path, f"{job_id}.json")
+    
+    def _save(self, job):
+        """Write the job status atomically so readers never see a partial file"""
+        try:
+            os.makedirs(self.jobs_path, exist_ok=True)
+            tmp_path = self._job_file(job['id']) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(job, f)
+            os.replace(tmp_path, self._job_file(job['id']))
+        except OSError as e:
+            print(f"Warning: Failed to persist face job {job['id']}: {e}")
+    
+    def set_status(self, job_id, status, error=None):
+        """Move a job to running/done/failed, stamping start and finish times"""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = status
+            if status == 'running':
+                job['started_at'] = now
+            elif status in ('done', 'failed'):
+                job['finished_at'] = now
+                job['error'] = error
+            snapshot = dict(job)
+        self._save(snapshot)
+    
+    def create(self, job_type, owner=None):
+        """Register a queued job whose status is driven by the caller through set_status()"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'type': job_type,
+            'owner': owner,
+            'status': 'queued',
+            'created_at': datetime.utcnow().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None
+        }
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            
+            # Forget the oldest finished jobs once the history is full
+            while len(self._jobs) > self.max_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest['status'] in ('queued', 'running'):
+                    break
+                del self._jobs[oldest_id]
+                try:
+                    os.remove(self._job_file(oldest_id))
+                except OSError:
+                    pass
+            
+            snapshot = dict(job)
+        
+        self._save(snapshot)
+        return job_id
+    
+    def get(self, job_id):
+        """Return a copy of a job's status, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        
+        # Submitted by another worker process on this host
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._job_file(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+job_runner = FaceJobRunner()
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+
+# Side length crops are resized to before scoring, so scores compare across face sizes
+SCORE_SIZE = 100
+
+
+def sharpness(face_img):
+    """Variance of the Laplacian; low values mean a blurred or featureless crop"""
+    face = cv2.resize(face_img, (SCORE_SIZE, SCORE_SIZE), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(face, cv2.CV_64F).var())
+
+
+def dhash(face_img, hash_size=8):
+    """64-bit difference hash: sign of the horizontal gradient on a tiny thumbnail"""
+    thumb = cv2.resize(face_img, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def select_samples(faces, keep, duplicate_bits, min_sharpness=0.0, minimum=3):
+    """Pick the sharpest distinct crops.
+    
+    Crops are visited sharpest first and kept unless they fall under
+    min_sharpness or their dHash is within duplicate_bits of a crop already
+    kept. At most `keep` crops are kept; if fewer than `minimum` survive, the
+    sharpest near-duplicate or surplus crops are taken back so registration
+    can still succeed. Crops under min_sharpness are never taken back.
+    
+    Returns one dict per crop, in input order, with its sharpness, hash and
+    whether it was selected (with the reason when it was not).
+    """
+    scored = [{
+        'sharpness': sharpness(face),
+        'hash': dhash(face),
+        'selected': False,
+        'reason': None
+    } for face in faces]
+    order = sorted(range(len(faces)), key=lambda i: scored[i]['sharpness'], reverse=True)
+    
+    kept = []
+    for i in order:
+        score = scored[i]
+        if len(kept) >= keep:
+            score['reason'] = 'lower sharpness than the kept samples'
+        elif score['sharpness'] < min_sharpness:
+            score['reason'] = 'too blurry'
+        else:
+            duplicate = next((k for k in kept if hamming(score['hash'], scored[k]['hash']) <= duplicate_bits), None)
+            if duplicate is not None:
+                score['reason'] = 'near-duplicate'
+                score['duplicate_of'] = duplicate
+            else:
+                kept.append(i)
+    
+    # Too few distinct sharp crops: fall back to the sharpest of the rest that
+    # are sharp enough, preferring ones that are not exact copies of a kept crop
+    needed = min(minimum, keep, len(faces))
+    for exact_copies_allowed in (False, True):
+        for i in order:
+            if len(kept) >= needed:
+                break
+            if i in kept or scored[i]['reason'] == 'too blurry':
+                continue
+            if exact_copies_allowed or all(scored[i]['hash'] != scored[k]['hash'] for k in kept):
+                kept.append(i)
+    
+    for i in kept:
+        scored[i]['selected'] = True
+        scored[i]['reason'] = None
+        scored[i].pop('duplicate_of', None)
+    return scored
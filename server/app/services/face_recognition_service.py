@@ -1,133 +1,297 @@
-import cv2
 import os
 import numpy as np
-from PIL import Image
-import base64
-import io
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from bson import ObjectId
+from config import Config
 from app.models.user_model import User
 from app.utils.db_connection import db_instance
+from app.services.face_engines import create_engine, convert_yaml_model, LBPHEngine, HistogramIndexEngine
+from app.services.face_training import TrainingCoordinator
+from app.services.face_quality import select_samples
+from app.services.face_store import (
+    create_sample_store,
+    load_all_samples,
+    migrate_legacy_samples,
+    legacy_sample_dirs
+)
+from app.services.face_detection import FaceDetector, check_image
+from app.services.face_compute import ComputeBusy, create_compute_pool, extract_face_task, extract_sample_task
+from app.utils.metrics import metrics, record_stages
+from app.utils.cache import TTLCache, SingleFlight, cached_call
+
+try:
+    import fcntl
+except ImportError:  # Windows: model writes are only serialized within a process
+    fcntl = None
+
+# LBPH distance below which a probe counts as a match
+RECOGNITION_THRESHOLD = 70
 
 
 class FaceRecognitionService:
-    def __init__(self):
-        # Initialize face cascade classifier
-        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
+    def __init__(self, compute_pool=True):
+        # Decodes uploads and finds the face in them (also used on its own by compute workers)
+        self.detector = FaceDetector(Config.FACE_DECODE_MAX_DIM)
+        
+        # Worker processes that decode and detect faces off the request threads
+        self.compute = create_compute_pool() if compute_pool else None
+        
+        # Without worker processes, a bounded thread pool decodes and detects
+        # registration samples concurrently (OpenCV releases the GIL); 1 processes samples inline
+        self.sample_workers = max(1, Config.FACE_SAMPLE_WORKERS)
+        self._sample_pool = None
+        if self.compute is None and self.sample_workers > 1:
+            self._sample_pool = ThreadPoolExecutor(max_workers=self.sample_workers, thread_name_prefix='face-sample')
         
-        # Initialize LBPH recognizer
-        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        # Initialize recognizer engine ('lbph' or the vectorized 'index')
+        self.engine_name = Config.FACE_ENGINE
+        self.model_mmap = Config.FACE_MODEL_MMAP
+        self.engine = self._new_engine()
         
         # Paths for storing face data
         self.dataset_path = "face_dataset"
-        self.trainer_path = "face_trainer.yml"
+        self.trainer_path = Config.FACE_MODEL_PATH or self.engine.model_file
         
         # Ensure dataset directory exists
         os.makedirs(self.dataset_path, exist_ok=True)
+        
+        # Normalized samples, one compact array per face_id
+        self.samples = create_sample_store(self.dataset_path)
+        
+        # Stamp (mtime, size) of the trainer file currently loaded in memory. The
+        # published engine is never changed in place (changes go to a copy that is
+        # swapped in), so predictions use it without a lock; _model_lock only keeps
+        # the engine and its stamp consistent, and _reload_lock serializes reloads.
+        self._model_stamp = None
+        self._model_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        
+        # Set once an unconvertible YAML model has been handed to the trainer for a rebuild
+        self._legacy_rebuild_queued = False
+        
+        # Serializes writers (train/update) of the trainer file
+        self._train_lock = threading.RLock()
+        self._write_lock_depth = 0
+        
+        # Queues and coalesces model changes onto one background writer
+        self.trainer = TrainingCoordinator(self)
+        
+        # Short-lived recognition results, shared by retries and concurrent identical requests
+        self._result_cache = TTLCache('face.result_cache', Config.FACE_RESULT_CACHE_SIZE, Config.FACE_RESULT_CACHE_TTL)
+        self._result_flight = SingleFlight('face.result_cache')
     
-    def decode_base64_image(self, base64_string):
-        """Decode base64 image string to numpy array"""
+    def _trainer_stamp(self):
+        """Return the (mtime, size) stamp of the trainer file, or None if missing"""
         try:
-            # Remove the data URL prefix if present
-            if ',' in base64_string:
-                base64_string = base64_string.split(',')[1]
-            
-            # Decode base64 to bytes
-            image_bytes = base64.b64decode(base64_string)
-            
-            # Convert to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Convert to numpy array
-            img_array = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            
-            return img_array
-        except Exception as e:
-            raise ValueError(f"Failed to decode image: {str(e)}")
+            stat = os.stat(self.trainer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _publish_engine(self, engine, stamp):
+        """Swap in an engine so concurrent readers never see a half-loaded model"""
+        with self._model_lock:
+            self.engine = engine
+            self._model_stamp = stamp
+    
+    @contextmanager
+    def _model_write_lock(self):
+        """Hold the in-process training lock and, where supported, an exclusive lock file shared by all workers"""
+        with self._train_lock:
+            # Re-entered (train_model inside apply_model_changes): the file lock is already held
+            if fcntl is None or self._write_lock_depth:
+                self._write_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._write_lock_depth -= 1
+                return
+            with open(self.trainer_path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._write_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._write_lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _write_model(self, engine):
+        """Save an engine to a temporary file and atomically rename it over the trainer file"""
+        root, ext = os.path.splitext(self.trainer_path)
+        tmp_path = f"{root}.tmp-{os.getpid()}{ext}"
+        try:
+            engine.save(tmp_path)
+            os.replace(tmp_path, self.trainer_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self._trainer_stamp()
+    
+    def _new_engine(self):
+        """Create an empty engine of the configured type"""
+        if self.engine_name == HistogramIndexEngine.name:
+            return create_engine(
+                self.engine_name,
+                mmap=self.model_mmap,
+                search=Config.FACE_SEARCH_MODE,
+                candidates=Config.FACE_SEARCH_CANDIDATES,
+                probes=Config.FACE_SEARCH_PROBES
+            )
+        return create_engine(self.engine_name)
+    
+    def _publish_written(self, engine, stamp):
+        """Publish a freshly written engine, swapping private memory for the shared file mapping when enabled"""
+        if getattr(engine, 'mmap', False) and self.trainer_path.endswith('.npz'):
+            engine = self._new_engine()
+            engine.load(self.trainer_path)
+        self._publish_engine(engine, stamp)
+    
+    def load_model(self):
+        """Return the trained engine, reloading it only when a newer trainer file is published"""
+        stamp = self._trainer_stamp()
+        if stamp is None and self._convert_legacy_model():
+            stamp = self._trainer_stamp()
+        if stamp is None and self._legacy_rebuild_queued:
+            raise ValueError("The face model is being rebuilt from the stored samples. Please try again shortly.")
+        if stamp is None:
+            raise ValueError("No trained model found. Please register faces first.")
+        
+        if stamp == self._model_stamp:
+            return self.engine
+        
+        # Load off the model lock; concurrent predictions keep using the old engine meanwhile
+        with self._reload_lock:
+            if stamp != self._model_stamp:
+                engine = self._new_engine()
+                engine.load(self.trainer_path)
+                self._publish_engine(engine, stamp)
+                print(f"Loaded face model from {self.trainer_path}")
+            return self.engine
+    
+    def _convert_legacy_model(self):
+        """One-time migration of an existing YAML trainer file to the binary model format.
+        
+        A YAML model that cannot be converted (trained on faces of different
+        sizes) is left alone and a rebuild from the samples is queued instead,
+        once per process; returns False until a binary model exists.
+        """
+        legacy_path = LBPHEngine.model_file
+        if self._legacy_rebuild_queued or not self.trainer_path.endswith('.npz') or not os.path.exists(legacy_path):
+            return False
+        
+        with self._model_write_lock():
+            if not os.path.exists(self.trainer_path) and os.path.exists(legacy_path):
+                try:
+                    samples = convert_yaml_model(legacy_path, self.trainer_path)
+                except ValueError as e:
+                    print(f"❌ Cannot convert {legacy_path} ({e}); rebuilding the face model from the stored samples")
+                    self._legacy_rebuild_queued = True
+                    self.trainer.request_rebuild()
+                    return False
+                
+                # Keep the YAML as a backup, but never convert it again
+                os.replace(legacy_path, legacy_path + '.converted')
+                print(f"Converted {legacy_path} to {self.trainer_path} ({samples} samples)")
+        return True
     
-    def detect_face(self, image):
-        """Detect face in image and return face region"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        
-        if len(faces) == 0:
-            raise ValueError("No face detected in the image")
-        elif len(faces) > 1:
-            raise ValueError("Multiple faces detected. Please ensure only one face is visible")
-        
-        # Return the face region
-        x, y, w, h = faces[0]
-        face_img = gray[y:y+h, x:x+w]
+    def extract_probe(self, uploaded_image):
+        """Decode an uploaded image and return the face region, in a compute worker when enabled"""
+        if self.compute is not None:
+            (face_img, _), stages = self.compute.run(extract_face_task, uploaded_image)
+            record_stages(stages)
+            return face_img
+        face_img, _ = self.detector.extract_face(uploaded_image)
         return face_img
     
-    def get_next_face_id(self):
-        """Get the next available face ID"""
-        # Get all existing face IDs from users collection
-        users_collection = User.get_collection()
-        existing_face_ids = users_collection.distinct("face_id", {"face_id": {"$exists": True, "$ne": None}})
-        
-        # Find the next available ID
-        face_id = 1
-        while face_id in existing_face_ids:
-            face_id += 1
-        
-        return face_id
+    def extract_samples(self, images):
+        """Run the detector's extract_sample() over many images on the compute or sample pool, keeping their order"""
+        if self.compute is not None:
+            extracted = []
+            for result, stages in self.compute.map(extract_sample_task, images):
+                record_stages(stages)
+                extracted.append(result)
+            return extracted
+        if self._sample_pool is None:
+            return [self.detector.extract_sample(image) for image in images]
+        return list(self._sample_pool.map(self.detector.extract_sample, images))
     
-    def register_face_samples(self, user_id, base64_images):
-        """Register face samples for a user"""
-        if len(base64_images) < 3:
+    def register_face_samples(self, user_id, images, background=False):
+        """Register face samples (raw bytes or base64 strings) for a user.
+        
+        With background=True the model update is queued on the job runner and
+        the result carries its job_id instead of waiting for training.
+        """
+        if len(images) < 3:
             raise ValueError("Minimum 3 images required for face registration")
         
-        if len(base64_images) > 30:
+        if len(images) > 30:
             raise ValueError("Maximum 30 images allowed for face registration")
         
-        # Get or assign face ID
         user = User.find_by_id(user_id)
         if not user:
             raise ValueError("User not found")
         
+        # Decode and detect every image concurrently, then handle results in order.
+        # Done before touching the user's data so a busy compute pool changes nothing.
+        extracted = self.extract_samples(images)
+        
+        # Get or assign face ID
         face_id = user.get('face_id')
+        assigned_face_id = False
         if not face_id:
-            face_id = self.get_next_face_id()
-        
-        # Create user directory
-        user_dir = os.path.join(self.dataset_path, f"user_{face_id}")
-        os.makedirs(user_dir, exist_ok=True)
-        
-        # Clear existing samples for this user
-        for filename in os.listdir(user_dir):
-            if filename.endswith('.jpg'):
-                os.remove(os.path.join(user_dir, filename))
+            # Claimed from the shared counter, so no other process or request can pick the same one
+            face_id, assigned_face_id = User.claim_face_id(user_id)
         
         results = []
+        face_samples = []
         saved_count = 0
         
-        # Process each image
-        for idx, base64_image in enumerate(base64_images, 1):
+        # Keep only the sharpest, visually distinct faces
+        found = [idx for idx, (face_img, _, error) in enumerate(extracted, 1) if not error]
+        scores = dict(zip(found, select_samples(
+            [extracted[idx - 1][0] for idx in found],
+            keep=Config.FACE_SAMPLE_KEEP,
+            duplicate_bits=Config.FACE_SAMPLE_DUPLICATE_BITS,
+            min_sharpness=Config.FACE_SAMPLE_MIN_SHARPNESS
+        )))
+        
+        for idx, (face_img, face_box, error) in enumerate(extracted, 1):
             try:
-                # Decode image
-                image = self.decode_base64_image(base64_image)
+                if error:
+                    raise ValueError(error)
                 
-                # Detect and extract face
-                face_img = self.detect_face(image)
+                score = scores[idx]
+                quality = {
+                    "face_box": face_box,
+                    "sharpness": round(score['sharpness'], 2),
+                    "hash": f"{score['hash']:016x}",
+                    "selected": score['selected']
+                }
                 
-                # Save face sample
-                filename = f"{idx}.jpg"
-                filepath = os.path.join(user_dir, filename)
-                cv2.imwrite(filepath, face_img)
+                if not score['selected']:
+                    reason = score['reason']
+                    if 'duplicate_of' in score:
+                        reason += f" of sample {found[score['duplicate_of']]}"
+                    results.append({
+                        "sample": idx,
+                        "success": True,
+                        "message": f"Face sample {idx} skipped: {reason}",
+                        **quality
+                    })
+                    continue
+                
+                # Keep face sample
+                face_samples.append(face_img)
                 
                 saved_count += 1
                 results.append({
                     "sample": idx,
                     "success": True,
-                    "message": f"Face sample {idx} saved successfully"
+                    "message": f"Face sample {idx} saved successfully",
+                    **quality
                 })
                 
             except Exception as e:
@@ -138,102 +302,146 @@ class FaceRecognitionService:
                 })
         
         if saved_count < 3:
-            # Clean up if we don't have enough valid samples
-            for filename in os.listdir(user_dir):
-                if filename.endswith('.jpg'):
-                    os.remove(os.path.join(user_dir, filename))
+            # Keep any previous samples if we don't have enough valid ones
+            if assigned_face_id:
+                User.unset_fields(user_id, "face_id")
             raise ValueError(f"Only {saved_count} valid face samples found. Minimum 3 required.")
         
-        # Update user with face_id
-        User.update_user(user_id, {"face_id": face_id})
+        # Replace the user's samples in one write
+        self.samples.save(face_id, np.stack(face_samples))
         
-        # Train the model
-        self.train_model()
-        
-        return {
+        result = {
             "face_id": face_id,
             "samples_saved": saved_count,
             "results": results
         }
+        
+        # Fold only this user's samples into the model (coalesced with concurrent changes)
+        job_id = self.trainer.request_update(face_id, face_samples, owner=str(user_id), wait=not background)
+        if background:
+            result["job_id"] = job_id
+        
+        return result
     
     def train_model(self):
-        """Train the face recognition model with all registered faces"""
-        def get_images_and_labels(path):
-            image_paths = []
-            for user_folder in os.listdir(path):
-                full_path = os.path.join(path, user_folder)
-                if os.path.isdir(full_path) and user_folder.startswith('user_'):
-                    for f in os.listdir(full_path):
-                        if f.endswith('.jpg'):
-                            image_paths.append(os.path.join(full_path, f))
-            
-            face_samples = []
-            ids = []
-            
-            for image_path in image_paths:
-                try:
-                    img = Image.open(image_path).convert('L')
-                    img_np = np.array(img, 'uint8')
-                    face_id = int(os.path.basename(os.path.dirname(image_path)).split('_')[1])
-                    
-                    # The image is already a face region, so we can use it directly
-                    face_samples.append(img_np)
-                    ids.append(face_id)
-                except Exception as e:
-                    print(f"Error processing {image_path}: {e}")
-                    continue
-            
-            return face_samples, ids
+        """Rebuild the face recognition model from every registered face.
         
-        try:
-            faces, ids = get_images_and_labels(self.dataset_path)
+        This is a full O(total samples) retrain; registration and deletion go
+        through apply_model_changes() instead. Samples still stored in the old
+        directory-of-JPEGs layout are migrated to the sample store first.
+        """
+        with self._model_write_lock(), metrics.timer('face.train'):
+            try:
+                migrated = migrate_legacy_samples(self.samples)
+                if migrated:
+                    print(f"Migrated face samples of {migrated} users to the {self.samples.name} sample store")
+                
+                # One bulk array load instead of a file open and JPEG decode per sample
+                faces, ids = load_all_samples(self.samples)
+                
+                if len(faces) == 0:
+                    raise ValueError("No face samples found for training")
+                
+                # Train a fresh engine and publish it once it is saved
+                engine = self._new_engine()
+                engine.train(list(faces), ids)
+                self._publish_written(engine, self._write_model(engine))
+                
+                print(f"Model training completed. Trained on {len(faces)} samples.")
+                return True
+                
+            except Exception as e:
+                raise ValueError(f"Model training failed: {str(e)}")
+    
+    def apply_model_changes(self, updates, removals=(), rebuild=False):
+        """Apply a batch of model changes in one write.
+        
+        updates maps face_id -> new face samples and removals lists face_ids to
+        drop. Changes are folded into the loaded model; a full train_model()
+        only runs when asked for, when there is no model yet, or when the
+        engine cannot be copied (LBPH) or cannot forget the samples of a
+        re-registered/removed face_id.
+        """
+        with self._model_write_lock():
+            if rebuild:
+                return self.train_model()
             
-            if len(faces) == 0:
-                raise ValueError("No face samples found for training")
+            if not self.has_registered_faces():
+                # Remove trainer file if no faces left
+                if os.path.exists(self.trainer_path):
+                    os.remove(self.trainer_path)
+                self._publish_engine(self._new_engine(), None)
+                return True
             
-            # Train the recognizer
-            self.recognizer.train(faces, np.array(ids))
-            self.recognizer.save(self.trainer_path)
+            try:
+                published = self.load_model()
+            except ValueError:
+                return self.train_model()
             
-            print(f"Model training completed. Trained on {len(faces)} samples.")
-            return True
+            # The published engine is never changed in place; an engine that cannot be
+            # copied cheaply (LBPH) is rebuilt instead, which is the cheaper of the two
+            replaced = [face_id for face_id in list(updates) + list(removals) if published.has_label(face_id)]
+            if not published.can_copy or (replaced and not published.can_remove):
+                return self.train_model()
             
-        except Exception as e:
-            raise ValueError(f"Model training failed: {str(e)}")
+            try:
+                with metrics.timer('face.train'):
+                    # Copy-on-write: change a private copy of the published model (load_model()
+                    # checked it matches the file we hold the write lock on) and swap it in
+                    engine = published.copy()
+                    for face_id in replaced:
+                        engine.remove(face_id)
+                    for face_id, face_samples in updates.items():
+                        engine.update(face_samples, np.full(len(face_samples), face_id, dtype=np.int32))
+                    
+                    self._publish_written(engine, self._write_model(engine))
+                
+                print(f"Model updated: {len(updates)} face IDs added, {len(replaced)} replaced or removed.")
+                return True
+                
+            except Exception as e:
+                raise ValueError(f"Model update failed: {str(e)}")
     
-    def recognize_face(self, base64_image):
-        """Recognize a face from base64 image"""
-        if not os.path.exists(self.trainer_path):
-            raise ValueError("No trained model found. Please register faces first.")
+    def recognize_face(self, uploaded_image):
+        """Recognize a face from raw image bytes or a base64 string.
+        
+        Identical images recognized against the same model version within a
+        few seconds share one result, and concurrent ones one computation.
+        """
+        # Load the trained model (no-op unless a newer model was published)
+        with metrics.timer('face.model_load'):
+            engine = self.load_model()
         
+        if not self._result_cache.enabled:
+            return self._recognize(engine, uploaded_image)
+        
+        # Key on the image content and the version of the model that will answer
+        with self._model_lock:
+            engine, model_version = self.engine, self._model_stamp
+        check_image(uploaded_image)
+        payload = uploaded_image.encode() if isinstance(uploaded_image, str) else bytes(uploaded_image)
+        key = (hashlib.blake2b(payload, digest_size=16).digest(), model_version)
+        return dict(cached_call(self._result_cache, self._result_flight, key,
+                                lambda: self._recognize(engine, uploaded_image)))
+    
+    def _recognize(self, engine, uploaded_image):
+        """Run decode, detection, prediction and the user lookup for one image"""
         try:
-            # Load the trained model
-            self.recognizer.read(self.trainer_path)
-            
             # Decode and process image
-            image = self.decode_base64_image(base64_image)
-            face_img = self.detect_face(image)
+            face_img = self.extract_probe(uploaded_image)
             
             # Perform recognition
-            face_id, confidence = self.recognizer.predict(face_img)
+            with metrics.timer('face.predict'):
+                face_id, confidence = engine.predict(face_img)
             
             # Calculate accuracy (lower confidence means higher accuracy)
             accuracy = max(0, 100 - confidence)
             
-            if confidence < 70:  # Recognition threshold
+            if confidence < RECOGNITION_THRESHOLD:
                 # Find user by face_id
-                users_collection = User.get_collection()
-                user = users_collection.find_one({"face_id": face_id})
+                user_data = self._find_face_user(face_id)
                 
-                if user:
-                    # Remove sensitive data
-                    user_data = {
-                        "id": str(user["_id"]),
-                        "firstName": user.get("firstName", ""),
-                        "lastName": user.get("lastName", ""),
-                        "email": user.get("email", "")
-                    }
-                    
+                if user_data:
                     return {
                         "recognized": True,
                         "user": user_data,
@@ -247,9 +455,132 @@ class FaceRecognitionService:
                 "accuracy": float(accuracy)
             }
             
+        except ComputeBusy:
+            raise
         except Exception as e:
             raise ValueError(f"Face recognition failed: {str(e)}")
     
+    def recognize_faces(self, frames, min_votes=None):
+        """Recognize one person from a burst of frames with early-exit voting.
+        
+        Frames are processed in order against a single model snapshot. Every
+        frame under the recognition threshold votes for its face_id, and the
+        burst stops as soon as one face_id has min_votes votes. Otherwise the
+        face_id with the most votes wins if it matched a majority of the frames
+        in which a face was found.
+        """
+        min_votes = max(1, min_votes or Config.FACE_BATCH_MIN_VOTES)
+        
+        # Load the trained model once for the whole burst
+        with metrics.timer('face.model_load'):
+            engine = self.load_model()
+        
+        votes = {}
+        faces_found = 0
+        frames_processed = 0
+        errors = []
+        decided = None
+        
+        for index, frame in enumerate(frames):
+            frames_processed += 1
+            try:
+                face_img = self.extract_probe(frame)
+            except ComputeBusy:
+                raise
+            except Exception as e:
+                errors.append({"frame": index, "error": str(e)})
+                continue
+            
+            faces_found += 1
+            with metrics.timer('face.predict'):
+                face_id, confidence = engine.predict(face_img)
+            
+            if confidence < RECOGNITION_THRESHOLD:
+                votes.setdefault(face_id, []).append(float(confidence))
+                if len(votes[face_id]) >= min_votes:
+                    decided = face_id
+                    break
+        
+        if not faces_found:
+            raise ValueError(f"Face recognition failed: no face detected in {len(errors)} frames")
+        
+        # Most votes wins; ties go to the lower (better) mean confidence
+        if decided is None and votes:
+            best = min(votes, key=lambda face_id: (-len(votes[face_id]), np.mean(votes[face_id])))
+            if len(votes[best]) * 2 > faces_found:
+                decided = best
+        
+        result = {
+            "recognized": False,
+            "frames_total": len(frames),
+            "frames_processed": frames_processed,
+            "faces_found": faces_found,
+            "votes": len(votes[decided]) if decided is not None else 0,
+            "errors": errors
+        }
+        
+        if decided is not None:
+            confidence = float(np.mean(votes[decided]))
+            result["confidence"] = confidence
+            result["accuracy"] = float(max(0, 100 - confidence))
+            user_data = self._find_face_user(decided)
+            if user_data:
+                result["recognized"] = True
+                result["user"] = user_data
+        else:
+            result["confidence"] = None
+            result["accuracy"] = None
+        
+        return result
+    
+    def _find_face_user(self, face_id):
+        """Public fields of the user registered under face_id, or None"""
+        with metrics.timer('face.db_lookup'):
+            users_collection = User.get_collection()
+            user = users_collection.find_one({"face_id": face_id})
+        if not user:
+            return None
+        
+        # Remove sensitive data
+        return {
+            "id": str(user["_id"]),
+            "firstName": user.get("firstName", ""),
+            "lastName": user.get("lastName", ""),
+            "email": user.get("email", "")
+        }
+    
+    def verify_face(self, user, uploaded_image):
+        """Verify a face against one user's own samples (1:1) instead of searching everyone"""
+        face_id = user.get('face_id')
+        if not face_id:
+            raise ValueError("No face registered for this user")
+        
+        # Load the trained model (no-op unless a newer model was published)
+        with metrics.timer('face.model_load'):
+            engine = self.load_model()
+        
+        try:
+            # Decode and process image
+            face_img = self.extract_probe(uploaded_image)
+            
+            # Compare only against this user's samples
+            with metrics.timer('face.predict'):
+                distance = engine.verify(face_img, face_id)
+        except ComputeBusy:
+            raise
+        except Exception as e:
+            raise ValueError(f"Face verification failed: {str(e)}")
+        
+        if distance is None:
+            raise ValueError("No trained face samples found for this user. Please register your face again.")
+        
+        return {
+            "verified": distance < RECOGNITION_THRESHOLD,
+            "face_id": face_id,
+            "confidence": float(distance),
+            "accuracy": float(max(0, 100 - distance))
+        }
+    
     def delete_user_face_data(self, user_id):
         """Delete all face data for a user"""
         user = User.find_by_id(user_id)
@@ -259,39 +590,19 @@ class FaceRecognitionService:
         face_id = user.get('face_id')
         if face_id:
             # Delete user's face samples
-            user_dir = os.path.join(self.dataset_path, f"user_{face_id}")
-            if os.path.exists(user_dir):
-                for filename in os.listdir(user_dir):
-                    os.remove(os.path.join(user_dir, filename))
-                os.rmdir(user_dir)
+            self.samples.delete(face_id)
             
             # Remove face_id from user record
-            User.update_user(user_id, {"$unset": {"face_id": ""}})
+            User.unset_fields(user_id, "face_id")
             
-            # Retrain model with remaining faces
-            try:
-                if self.has_registered_faces():
-                    self.train_model()
-                else:
-                    # Remove trainer file if no faces left
-                    if os.path.exists(self.trainer_path):
-                        os.remove(self.trainer_path)
-            except Exception as e:
-                print(f"Warning: Failed to retrain model after deletion: {e}")
+            # Drop the user's samples from the model in the background
+            self.trainer.request_remove(face_id, owner=str(user_id))
         
         return True
     
     def has_registered_faces(self):
         """Check if there are any registered faces"""
-        if not os.path.exists(self.dataset_path):
-            return False
-        
-        for item in os.listdir(self.dataset_path):
-            item_path = os.path.join(self.dataset_path, item)
-            if os.path.isdir(item_path) and item.startswith('user_'):
-                if any(f.endswith('.jpg') for f in os.listdir(item_path)):
-                    return True
-        return False
+        return bool(self.samples.face_ids() or legacy_sample_dirs(self.dataset_path))
     
     def user_has_face_registered(self, user_id):
         """Check if a user has registered face samples"""
@@ -303,9 +614,23 @@ class FaceRecognitionService:
         if not face_id:
             return False
         
-        user_dir = os.path.join(self.dataset_path, f"user_{face_id}")
-        if not os.path.exists(user_dir):
-            return False
-        
         # Check if there are any face samples
-        return any(f.endswith('.jpg') for f in os.listdir(user_dir))
\ No newline at end of file
+        return self.samples.has(face_id) or face_id in legacy_sample_dirs(self.dataset_path)
+
+
+_face_service = None
+_face_service_lock = threading.Lock()
+
+
+def get_face_service():
+    """Return the process-wide FaceRecognitionService, creating it on first use"""
+    global _face_service
+    if _face_service is None:
+        with _face_service_lock:
+            if _face_service is None:
+                _face_service = FaceRecognitionService()
+                
+                # Samples in the old JPEG layout: migrate them and retrain on normalized crops
+                if legacy_sample_dirs(_face_service.dataset_path):
+                    _face_service.trainer.request_rebuild()
+    return _face_service
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+# Below this many rows an exact scan is already fast, so no coarse index is built
+COARSE_MIN_ROWS = 5000
+
+# PCA dimensions kept; 64 lose too much identity detail to rank users reliably
+COARSE_DIMS = 256
+
+
+class CoarseIndex:
+    """Reduced-dimension cell index over LBPH histograms.
+    
+    Histograms are square-rooted (Hellinger), projected onto a PCA basis
+    and clustered into cells with k-means. A query visits the nearest cells,
+    ranks users by the mean projected distance of their rows there and hands
+    the best users to an exact chi-square re-rank.
+    """
+    
+    def __init__(self, mean, components, centroids):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+    
+    @classmethod
+    def fit(cls, histograms, dims=COARSE_DIMS, cells=None, sample_size=20000, iterations=10, seed=0):
+        """Fit the PCA basis and k-means cells on a sample of histogram rows"""
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(len(histograms), size=min(sample_size, len(histograms)), replace=False)
+        sample = np.sqrt(np.asarray(histograms[np.sort(sample_rows)], dtype=np.float32))
+        
+        mean = sample.mean(axis=0)
+        components = _randomized_pca(sample - mean, min(dims, len(sample) - 1), rng)
+        index = cls(mean, components, np.empty((0, components.shape[0]), dtype=np.float32))
+        
+        projected = index.project(sample, transformed=True)
+        cells = cells or int(np.clip(np.sqrt(len(histograms)), 1, 4096))
+        index.centroids = _kmeans(projected, min(cells, len(projected)), iterations, rng)
+        return index
+    
+    def project(self, histograms, transformed=False, chunk_rows=4096):
+        """Project histogram rows into the reduced space"""
+        histograms = np.atleast_2d(histograms)
+        projected = np.empty((len(histograms), self.components.shape[0]), dtype=np.float32)
+        for start in range(0, len(histograms), chunk_rows):
+            chunk = np.asarray(histograms[start:start + chunk_rows], dtype=np.float32)
+            if not transformed:
+                chunk = np.sqrt(chunk)
+            projected[start:start + chunk_rows] = (chunk - self.mean) @ self.components.T
+        return projected
+    
+    def assign(self, projected):
+        """Nearest cell for every projected row"""
+        return _nearest(projected, self.centroids)
+    
+    def nearest_cells(self, projected_probe, probes):
+        """The probes cells closest to one projected query"""
+        distances = ((self.centroids - projected_probe) ** 2).sum(axis=1)
+        probes = min(probes, len(distances))
+        return np.argpartition(distances, probes - 1)[:probes]
+    
+    def to_arrays(self):
+        return {
+            'coarse_mean': self.mean,
+            'coarse_components': self.components,
+            'coarse_centroids': self.centroids
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        if 'coarse_centroids' not in arrays:
+            return None
+        return cls(arrays['coarse_mean'], arrays['coarse_components'], arrays['coarse_centroids'])
+
+
+def _randomized_pca(centered, dims, rng, oversample=10, power_iterations=2):
+    """Top principal axes of a centered matrix (Halko et al. randomized range finder)"""
+    basis = centered @ rng.standard_normal((centered.shape[1], dims + oversample)).astype(np.float32)
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(basis)
+        basis = centered @ (centered.T @ basis)
+    basis, _ = np.linalg.qr(basis)
+    _, _, vt = np.linalg.svd(basis.T @ centered, full_matrices=False)
+    return vt[:dims].astype(np.float32)
+
+
+def _nearest(points, centroids, chunk_rows=65536):
+    """Index of the nearest centroid for every point"""
+    nearest = np.empty(len(points), dtype=np.int32)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(points), chunk_rows):
+        chunk = points[start:start + chunk_rows]
+        distances = centroid_norms - 2 * chunk @ centroids.T
+        nearest[start:start + chunk_rows] = distances.argmin(axis=1)
+    return nearest
+
+
+def _kmeans(points, k, iterations, rng):
+    """Plain Lloyd's k-means"""
+    centroids = points[rng.choice(len(points), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(points, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
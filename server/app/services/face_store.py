@@ -0,0 +1,194 @@
+import io
+import os
+import shutil
+import cv2
+import gridfs
+import numpy as np
+from PIL import Image
+from config import Config
+from app.utils.db_connection import db_instance
+
+
+# Every stored sample and every probe is normalized to this square size
+FACE_SIZE = 100
+
+
+def normalize_face(face_img, size=FACE_SIZE):
+    """Resize a grayscale face crop to size x size and equalize its histogram"""
+    interpolation = cv2.INTER_AREA if min(face_img.shape[:2]) >= size else cv2.INTER_LINEAR
+    face = cv2.resize(face_img, (size, size), interpolation=interpolation)
+    return cv2.equalizeHist(face)
+
+
+def _to_bytes(samples):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(samples, dtype=np.uint8))
+    return buffer.getvalue()
+
+
+def _from_bytes(data):
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+class FileSampleStore:
+    """Normalized face samples as one (n, FACE_SIZE, FACE_SIZE) uint8 .npy file per face_id"""
+    name = 'file'
+    
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+    
+    def _file(self, face_id):
+        return os.path.join(self.path, f"user_{face_id}.npy")
+    
+    def save(self, face_id, samples):
+        """Replace a face_id's samples atomically"""
+        tmp_path = f"{self._file(face_id)}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_to_bytes(samples))
+            os.replace(tmp_path, self._file(face_id))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def load(self, face_id):
+        try:
+            return np.load(self._file(face_id), allow_pickle=False)
+        except FileNotFoundError:
+            return None
+    
+    def delete(self, face_id):
+        try:
+            os.remove(self._file(face_id))
+        except FileNotFoundError:
+            pass
+    
+    def has(self, face_id):
+        return os.path.exists(self._file(face_id))
+    
+    def face_ids(self):
+        face_ids = []
+        for filename in os.listdir(self.path):
+            if filename.startswith('user_') and filename.endswith('.npy'):
+                try:
+                    face_ids.append(int(filename[5:-4]))
+                except ValueError:
+                    continue
+        return sorted(face_ids)
+
+
+class GridFSSampleStore:
+    """Normalized face samples as one .npy file per face_id in MongoDB GridFS"""
+    name = 'gridfs'
+    
+    def __init__(self, path, collection='face_samples'):
+        # Local dataset directory, only read to migrate legacy JPEG samples
+        self.path = path
+        self.collection = collection
+        self._fs = None
+    
+    @property
+    def fs(self):
+        if self._fs is None:
+            self._fs = gridfs.GridFS(db_instance.get_db(), collection=self.collection)
+        return self._fs
+    
+    @staticmethod
+    def _filename(face_id):
+        return f"user_{face_id}.npy"
+    
+    def save(self, face_id, samples):
+        """Write a new version, then drop the older ones so readers always find a complete file"""
+        new_id = self.fs.put(_to_bytes(samples), filename=self._filename(face_id), metadata={'face_id': int(face_id)})
+        for old in self.fs.find({'filename': self._filename(face_id), '_id': {'$ne': new_id}}):
+            self.fs.delete(old._id)
+    
+    def load(self, face_id):
+        try:
+            return _from_bytes(self.fs.get_last_version(self._filename(face_id)).read())
+        except gridfs.NoFile:
+            return None
+    
+    def delete(self, face_id):
+        for old in self.fs.find({'filename': self._filename(face_id)}):
+            self.fs.delete(old._id)
+    
+    def has(self, face_id):
+        return self.fs.exists(filename=self._filename(face_id))
+    
+    def face_ids(self):
+        return sorted(int(face_id) for face_id in self.fs.find().distinct('metadata.face_id'))
+
+
+def legacy_sample_dirs(path):
+    """face_id -> directory for samples still stored as a directory of JPEGs"""
+    dirs = {}
+    if not os.path.isdir(path):
+        return dirs
+    for item in os.listdir(path):
+        item_path = os.path.join(path, item)
+        if os.path.isdir(item_path) and item.startswith('user_'):
+            try:
+                dirs[int(item[5:])] = item_path
+            except ValueError:
+                continue
+    return dirs
+
+
+def load_all_samples(store):
+    """Every stored sample as one (N, FACE_SIZE, FACE_SIZE) array plus its face_id labels"""
+    faces, labels = [], []
+    for face_id in store.face_ids():
+        samples = store.load(face_id)
+        if samples is not None and len(samples):
+            faces.append(samples)
+            labels.append(np.full(len(samples), face_id, dtype=np.int32))
+    if not faces:
+        return np.empty((0, FACE_SIZE, FACE_SIZE), dtype=np.uint8), np.empty(0, dtype=np.int32)
+    return np.concatenate(faces), np.concatenate(labels)
+
+
+def migrate_legacy_samples(store):
+    """Move face_dataset/user_<id>/*.jpg crops into the sample store; returns the number of users migrated.
+    
+    Files that are not JPEGs (.DS_Store, Thumbs.db, ...) are ignored. A
+    directory is only migrated and removed when every JPEG in it decodes;
+    otherwise it is left as it is and reported, so no sample is ever lost.
+    """
+    migrated = 0
+    for face_id, user_dir in legacy_sample_dirs(store.path).items():
+        samples = []
+        failed = []
+        for filename in sorted(os.listdir(user_dir)):
+            file_path = os.path.join(user_dir, filename)
+            if not filename.lower().endswith('.jpg'):
+                continue
+            try:
+                face = np.asarray(Image.open(file_path).convert('L'))
+                samples.append(normalize_face(face))
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
+                failed.append(filename)
+        
+        if failed:
+            print(f"❌ Face samples of face_id {face_id} not migrated: {len(failed)} of "
+                  f"{len(failed) + len(samples)} files in {user_dir} could not be read ({', '.join(failed[:5])}); "
+                  f"fix or remove them to finish the migration")
+            continue
+        
+        if samples:
+            store.save(face_id, np.stack(samples))
+            migrated += 1
+        
+        shutil.rmtree(user_dir)
+    return migrated
+
+
+def create_sample_store(dataset_path):
+    """Create the configured sample store ('file' or 'gridfs')"""
+    if Config.FACE_SAMPLE_STORE == GridFSSampleStore.name:
+        return GridFSSampleStore(dataset_path)
+    if Config.FACE_SAMPLE_STORE == FileSampleStore.name:
+        return FileSampleStore(dataset_path)
+    raise ValueError(f"Unknown face sample store: {Config.FACE_SAMPLE_STORE}")
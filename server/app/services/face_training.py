@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from app.services.face_jobs import job_runner
+
+
+class TrainingCoordinator:
+    """Serializes face model writes and coalesces concurrent change requests.
+    
+    Registrations, deletions and rebuilds are queued as pending changes. One
+    worker thread applies everything pending in a single model write, so a
+    burst of N requests that arrive while a run is in progress costs one
+    follow-up run instead of N retrains. Pending changes are keyed by
+    (face_id, owner), so one user's removal never cancels another's update.
+    """
+    
+    def __init__(self, service):
+        self.service = service
+        self._cond = threading.Condition()
+        self._updates = OrderedDict()
+        self._removals = set()
+        self._rebuild = False
+        self._tickets = []
+        self._running = False
+        self._thread = None
+        
+        # Counters exposed through stats()
+        self.requests = 0
+        self.runs = 0
+        self.coalesced = 0
+        self.rebuilds = 0
+        self.failures = 0
+    
+    def _ensure_worker(self):
+        """Start the worker thread on first use (after any fork)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='face-training', daemon=True)
+            self._thread.start()
+    
+    def _submit(self, owner, wait, apply):
+        ticket = {
+            'job_id': job_runner.create('train', owner=owner),
+            'done': threading.Event(),
+            'error': None
+        }
+        
+        with self._cond:
+            apply()
+            self._tickets.append(ticket)
+            self.requests += 1
+            self._ensure_worker()
+            self._cond.notify()
+        
+        if wait:
+            ticket['done'].wait()
+            if ticket['error']:
+                raise ValueError(ticket['error'])
+        return ticket['job_id']
+    
+    def request_update(self, face_id, face_samples, owner=None, wait=False):
+        """Queue one user's samples; a newer registration by the same owner replaces a pending one"""
+        def apply():
+            key = (face_id, owner)
+            self._updates.pop(key, None)
+            self._updates[key] = face_samples
+            self._removals.discard(key)
+        return self._submit(owner, wait, apply)
+    
+    def request_remove(self, face_id, owner=None, wait=False):
+        """Queue removal of a face_id from the model"""
+        def apply():
+            key = (face_id, owner)
+            self._updates.pop(key, None)
+            self._removals.add(key)
+        return self._submit(owner, wait, apply)
+    
+    def request_rebuild(self, owner=None, wait=False):
+        """Queue a full rebuild from the face dataset, which supersedes any pending change"""
+        def apply():
+            self._rebuild = True
+        return self._submit(owner, wait, apply)
+    
+    def stats(self):
+        """Counters for coalesced retraining"""
+        with self._cond:
+            return {
+                'requests': self.requests,
+                'runs': self.runs,
+                'coalesced': self.coalesced,
+                'rebuilds': self.rebuilds,
+                'failures': self.failures,
+                'pending': len(self._tickets),
+                'running': self._running
+            }
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._tickets:
+                    self._cond.wait()
+                
+                # Take everything pending; later requests wait for the next run
+                updates, removals, rebuild = self._updates, self._removals, self._rebuild
+                tickets = self._tickets
+                self._updates, self._removals, self._rebuild = OrderedDict(), set(), False
+                self._tickets = []
+                self._running = True
+            
+            for ticket in tickets:
+                job_runner.set_status(ticket['job_id'], 'running')
+            
+            error = None
+            try:
+                # Removals are applied first, so a face_id removed for one owner can still be updated for another
+                self.service.apply_model_changes(
+                    OrderedDict((face_id, face_samples) for (face_id, _), face_samples in updates.items()),
+                    {face_id for face_id, _ in removals},
+                    rebuild
+                )
+            except Exception as e:
+                print(f"Face model training failed: {e}")
+                error = str(e)
+            
+            with self._cond:
+                self.runs += 1
+                self.coalesced += len(tickets) - 1
+                self.rebuilds += 1 if rebuild else 0
+                self.failures += 1 if error else 0
+                self._running = False
+            
+            for ticket in tickets:
+                ticket['error'] = error
+                job_runner.set_status(ticket['job_id'], 'failed' if error else 'done', error=error)
+                ticket['done'].set()
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from app.utils.metrics import metrics
+
+
+class HashingBusy(Exception):
+    """Raised when the password hashing queue is full; retry after `retry_after` seconds"""
+    
+    def __init__(self, retry_after):
+        super().__init__("Too many sign-in requests right now, please retry shortly")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs pbkdf2 hashing and verification on a small bounded thread pool.
+    
+    At most `workers` hashes run at once (hashlib releases the GIL, so they use
+    real cores) and `queue_size` more may wait. Beyond that callers get
+    HashingBusy at once, so a login storm cannot occupy every request thread.
+    Queue depth is published as the `auth.hash.queue_depth` gauge and the time
+    spent waiting and hashing as `auth.hash.wait` / `auth.hash.<operation>`.
+    """
+    
+    def __init__(self, workers, queue_size, retry_after=1):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash') if workers > 0 else None
+    
+    def _set_depth(self, delta):
+        """Adjust the in-flight count (refusing to go over capacity) and publish it"""
+        with self._lock:
+            if delta > 0 and self._in_flight >= self.capacity:
+                metrics.increment('auth.hash.rejected')
+                raise HashingBusy(self.retry_after)
+            self._in_flight += delta
+            in_flight = self._in_flight
+        metrics.set_gauge('auth.hash.in_flight', in_flight)
+        metrics.set_gauge('auth.hash.queue_depth', max(0, in_flight - self.workers))
+    
+    def _run(self, operation, func, *args):
+        if self._executor is None:
+            with metrics.timer(f"auth.hash.{operation}"):
+                return func(*args)
+        
+        self._set_depth(1)
+        
+        queued = time.perf_counter()
+        
+        def task():
+            metrics.observe('auth.hash.wait', time.perf_counter() - queued)
+            with metrics.timer(f"auth.hash.{operation}"):
+                return func(*args)
+        
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            self._set_depth(-1)
+    
+    def hash(self, password):
+        """Hash a password for storing"""
+        return self._run('generate', generate_password_hash, password)
+    
+    def verify(self, stored_password, provided_password):
+        """Check a password against its stored hash"""
+        return self._run('verify', check_password_hash, stored_password, provided_password)
+
+
+password_hasher = PasswordHasher(
+    Config.PASSWORD_HASH_WORKERS,
+    Config.PASSWORD_HASH_QUEUE,
+    retry_after=Config.PASSWORD_HASH_RETRY_AFTER
+)
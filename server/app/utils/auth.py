@@ -1,13 +1,19 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify
 from functools import wraps
+import hashlib
+import time
 import jwt
 from datetime import datetime, timezone, timedelta
-from app.utils.db_connection import db_instance
+from app.models.user_model import User
+from app.utils.cache import TTLCache
 from bson.objectid import ObjectId
-import os
+from config import Config
 
-# Use the same secret key as auth_controller
-SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'botibot_secret_key_2025')
+# Shared by every place that issues or verifies tokens
+SECRET_KEY = Config.JWT_SECRET_KEY
+
+# Claims of recently verified tokens, keyed by token digest
+_verified_tokens = TTLCache('auth.token_cache', Config.JWT_CACHE_SIZE, Config.JWT_CACHE_TTL)
 
 def generate_token(user_id):
     """
@@ -37,6 +43,22 @@ def generate_token(user_id):
         algorithm='HS256'
     )
 
+def decode_token(token):
+    """
+    Verify a JWT token and return its claims, memoizing them until the token expires
+    
+    Raises:
+        jwt.ExpiredSignatureError, jwt.InvalidTokenError: as jwt.decode does
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    hit, claims = _verified_tokens.get(key)
+    if not hit:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        remaining = claims['exp'] - time.time() if 'exp' in claims else _verified_tokens.ttl
+        if remaining > 0:
+            _verified_tokens.set(key, claims, ttl=min(remaining, _verified_tokens.ttl))
+    return dict(claims)
+
 def token_required(f):
     """
     Decorator for protecting routes with JWT authentication
@@ -66,15 +88,10 @@ def token_required(f):
         
         try:
             # Decode the token
-            payload = jwt.decode(
-                token,
-                SECRET_KEY,
-                algorithms=['HS256']
-            )
+            payload = decode_token(token)
             
-            # Get user from database
-            db = db_instance.get_db()
-            user = db.users.find_one({'_id': ObjectId(payload['sub'])})
+            # Get user from database (or the recently authenticated cache)
+            user = User.find_cached(payload['sub'])
             
             if not user:
                 return jsonify({
@@ -136,15 +153,10 @@ def is_token_valid(token):
         bool: True if token is valid, False otherwise
     """
     try:
-        payload = jwt.decode(
-            token,
-            current_app.config.get('SECRET_KEY'),
-            algorithms=['HS256']
-        )
+        payload = decode_token(token)
         
         # Get user from database to verify existence
-        db = db_instance.get_db()
-        user = db.users.find_one({'_id': ObjectId(payload['sub'])})
+        user = User.find_cached(payload['sub'])
         
         return user is not None
     except:
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from app.utils.metrics import metrics
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    
+    Hits and misses are counted as `<name>.hit` / `<name>.miss` in the
+    metrics registry.
+    """
+    
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+    
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+    
+    def get(self, key, count=True):
+        """Return (True, value) for a live entry, else (False, None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                if count:
+                    metrics.increment(f"{self.name}.hit")
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+        if count:
+            metrics.increment(f"{self.name}.miss")
+        return False, None
+    
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result or exception"""
+    
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+        
+        if not leader:
+            metrics.increment(f"{self.name}.shared")
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        
+        try:
+            call['result'] = func()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+def cached_call(cache, flight, key, func):
+    """Return a cached result for key, or compute it once across concurrent callers and cache it"""
+    hit, value = cache.get(key)
+    if hit:
+        return value
+    
+    def compute():
+        # A caller that was just ahead of us may have filled the cache
+        hit, value = cache.get(key, count=False)
+        if hit:
+            return value
+        value = func()
+        cache.set(key, value)
+        return value
+    
+    return flight.do(key, compute)
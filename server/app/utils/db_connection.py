@@ -1,7 +1,22 @@
 from pymongo import MongoClient
 from config import Config
+from app.utils.mongo_metrics import PoolMetricsListener, CommandMetricsListener
 import os
 
+def client_options(settings):
+    """MongoClient keyword arguments for the pool settings of a config class"""
+    options = {
+        'maxPoolSize': settings.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': settings.MONGO_MIN_POOL_SIZE,
+        'serverSelectionTimeoutMS': settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'event_listeners': [PoolMetricsListener(), CommandMetricsListener()]
+    }
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS > 0:
+        options['waitQueueTimeoutMS'] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options['compressors'] = settings.MONGO_COMPRESSORS
+    return options
+
 class Database:
     _instance = None
     _client = None
@@ -12,10 +27,10 @@ class Database:
             cls._instance = super(Database, cls).__new__(cls)
         return cls._instance
     
-    def connect(self):
+    def connect(self, settings=Config):
         if self._client is None:
             try:
-                self._client = MongoClient(Config.MONGO_URI)
+                self._client = MongoClient(settings.MONGO_URI, **client_options(settings))
                 self._db = self._client.get_default_database()
                 self._client.admin.command('ping')
                 print("✅ Connected to MongoDB Atlas!")
@@ -0,0 +1,130 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Stage timings of the request handled by the current thread, for Server-Timing
+_trace = threading.local()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+    
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+    
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (max for the open bucket)"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+    
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': {
+                **{f"le_{bound}": count for bound, count in zip(self.bounds, self.buckets)},
+                'le_inf': self.buckets[-1]
+            }
+        }
+
+
+class MetricsRegistry:
+    """Process-wide latency histograms, counters and gauges"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+    
+    def observe(self, name, seconds):
+        """Record one duration; it also goes to the current request's trace"""
+        ms = seconds * 1000
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(ms)
+        
+        trace = getattr(_trace, 'stages', None)
+        if trace is not None:
+            trace.append((name, ms))
+    
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block into the named histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+    
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                'latency': {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items())),
+                'gauges': dict(sorted(self._gauges.items()))
+            }
+
+
+def start_trace():
+    """Start collecting stage timings for the current thread's request"""
+    _trace.stages = []
+
+
+def end_trace():
+    """Stop collecting and return [(name, ms), ...] for the current request"""
+    stages = getattr(_trace, 'stages', None) or []
+    _trace.stages = None
+    return stages
+
+
+def record_stages(stages):
+    """Record stage timings measured in another process (e.g. a face compute worker)"""
+    for name, ms in stages:
+        metrics.observe(name, ms / 1000)
+
+
+def server_timing(stages):
+    """Format stage timings as a Server-Timing header value, summing repeated stages"""
+    totals = {}
+    for name, ms in stages:
+        totals[name] = totals.get(name, 0.0) + ms
+    return ', '.join(f"{name.replace('.', '-')};dur={ms:.1f}" for name, ms in totals.items())
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,85 @@
+import threading
+import time
+from pymongo import monitoring
+from app.utils.metrics import metrics
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Publishes connection pool usage to the metrics registry.
+    
+    Gauges `mongo.pool.open` and `mongo.pool.in_use` count connections across
+    all servers; `mongo.pool.wait` is the time spent waiting to check one out.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        # Check-outs happen on the requesting thread, so its start time is kept per thread
+        self._checkout = threading.local()
+    
+    def _adjust(self, open_delta=0, in_use_delta=0):
+        with self._lock:
+            self._open += open_delta
+            self._in_use += in_use_delta
+            open_count, in_use = self._open, self._in_use
+        metrics.set_gauge('mongo.pool.open', open_count)
+        metrics.set_gauge('mongo.pool.in_use', in_use)
+    
+    def _checkout_seconds(self):
+        start = getattr(self._checkout, 'start', None)
+        self._checkout.start = None
+        return None if start is None else time.perf_counter() - start
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        metrics.increment('mongo.pool.cleared')
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        self._adjust(open_delta=1)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        self._adjust(open_delta=-1)
+    
+    def connection_check_out_started(self, event):
+        self._checkout.start = time.perf_counter()
+    
+    def connection_check_out_failed(self, event):
+        metrics.increment(f"mongo.pool.checkout_failed.{event.reason}")
+        seconds = self._checkout_seconds()
+        if seconds is not None:
+            metrics.observe('mongo.pool.wait', seconds)
+    
+    def connection_checked_out(self, event):
+        seconds = self._checkout_seconds()
+        if seconds is not None:
+            metrics.observe('mongo.pool.wait', seconds)
+        self._adjust(in_use_delta=1)
+    
+    def connection_checked_in(self, event):
+        self._adjust(in_use_delta=-1)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records the latency of every MongoDB command as `mongo.command.<name>`"""
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        metrics.observe(f"mongo.command.{event.command_name}", event.duration_micros / 1e6)
+    
+    def failed(self, event):
+        metrics.observe(f"mongo.command.{event.command_name}", event.duration_micros / 1e6)
+        metrics.increment(f"mongo.command.failed.{event.command_name}")
@@ -0,0 +1,46 @@
+import threading
+import time
+from collections import OrderedDict
+from app.utils.metrics import metrics
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `burst` attempts at once, refilled at `rate` per minute.
+    
+    Only the `maxsize` most recently seen keys are tracked; a forgotten key
+    simply starts again with a full bucket. Rejections are counted as
+    `<name>.rejected` in the metrics registry.
+    """
+    
+    def __init__(self, name, rate, burst, maxsize=10000):
+        self.name = name
+        self.rate = rate / 60.0
+        self.burst = burst
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+    
+    @property
+    def enabled(self):
+        return self.rate > 0 and self.burst > 0
+    
+    def acquire(self, key):
+        """Take one token for key; returns 0 if allowed, else seconds until one is available"""
+        if not self.enabled or not key:
+            return 0
+        
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        
+        if allowed:
+            return 0
+        metrics.increment(f"{self.name}.rejected")
+        return (1 - tokens) / self.rate
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark face model training and recognition as enrollment grows.
+Synthesizes face-like crops per identity (with augmented variations), enrolls
+them straight into the sample store of a scratch directory, then measures
+train_model(), model file size, model load time and predict latency for each
+engine and enrollment size. No network, camera or real dataset is needed.
+Exits non-zero if the index engine predicts slower than LBPH at a size both
+engines were run at.
+
+Usage (from the server directory):
+    python benchmarks/face_benchmark.py
+    python benchmarks/face_benchmark.py --identities 10,100,1000 --engines index --output results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+# Add the server directory to the path so we can import the app
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config import Config
+from app.services.face_recognition_service import FaceRecognitionService
+from app.services.face_store import FACE_SIZE, normalize_face
+
+# Slack for timing noise when checking that the index engine keeps up with LBPH
+INDEX_SPEED_TOLERANCE = 1.1
+
+
+def synthetic_identity(rng):
+    """Random parameters of one synthetic face"""
+    return {
+        'texture': cv2.resize(rng.integers(0, 256, (12, 12), dtype=np.uint8), (FACE_SIZE, FACE_SIZE),
+                              interpolation=cv2.INTER_CUBIC),
+        'skin': int(rng.integers(90, 200)),
+        'eye_y': int(rng.integers(30, 42)),
+        'eye_dx': int(rng.integers(16, 26)),
+        'eye_size': int(rng.integers(4, 9)),
+        'nose_len': int(rng.integers(10, 20)),
+        'mouth_y': int(rng.integers(68, 80)),
+        'mouth_w': int(rng.integers(12, 24)),
+        'face_w': int(rng.integers(34, 44)),
+        'face_h': int(rng.integers(42, 50))
+    }
+
+
+def render_face(identity, rng):
+    """Draw one augmented sample of an identity as a normalized grayscale crop"""
+    face = np.full((FACE_SIZE, FACE_SIZE), 40, dtype=np.uint8)
+    center = FACE_SIZE // 2
+    cv2.ellipse(face, (center, center), (identity['face_w'], identity['face_h']), 0, 0, 360, identity['skin'], -1)
+    face = cv2.addWeighted(face, 0.75, identity['texture'], 0.25, 0)
+    for side in (-1, 1):
+        eye = (center + side * identity['eye_dx'], identity['eye_y'])
+        cv2.circle(face, eye, identity['eye_size'], 20, -1)
+        cv2.line(face, (eye[0] - 8, eye[1] - 9), (eye[0] + 8, eye[1] - 10), 30, 2)
+    cv2.line(face, (center, identity['eye_y'] + 5), (center + 3, identity['eye_y'] + identity['nose_len']), 60, 2)
+    cv2.ellipse(face, (center, identity['mouth_y']), (identity['mouth_w'], 5), 0, 0, 180, 35, 2)
+    
+    # Augment: pose jitter, lighting, blur and sensor noise
+    angle, scale = rng.uniform(-8, 8), rng.uniform(0.93, 1.07)
+    matrix = cv2.getRotationMatrix2D((center + rng.uniform(-3, 3), center + rng.uniform(-3, 3)), angle, scale)
+    face = cv2.warpAffine(face, matrix, (FACE_SIZE, FACE_SIZE), borderMode=cv2.BORDER_REFLECT)
+    face = cv2.convertScaleAbs(face, alpha=rng.uniform(0.8, 1.2), beta=rng.uniform(-25, 25))
+    if rng.random() < 0.3:
+        face = cv2.GaussianBlur(face, (3, 3), 0)
+    noise = rng.normal(0, 4, face.shape)
+    face = np.clip(face + noise, 0, 255).astype(np.uint8)
+    return normalize_face(face)
+
+
+def percentile_ms(timings, q):
+    return round(float(np.percentile(timings, q)) * 1000, 3)
+
+
+def benchmark_engine(engine_name, identities, samples, queries, seed):
+    """Enroll `identities` synthetic users, then time training, loading and prediction"""
+    rng = np.random.default_rng(seed)
+    people = [synthetic_identity(rng) for _ in range(identities)]
+    
+    workdir = tempfile.mkdtemp(prefix='face_benchmark_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        Config.FACE_ENGINE = engine_name
+        Config.FACE_MODEL_PATH = None
+        face_service = FaceRecognitionService(compute_pool=False)
+        
+        # Enroll straight into the sample store (crops are already faces)
+        for face_id, identity in enumerate(people, 1):
+            face_service.samples.save(face_id, np.stack([render_face(identity, rng) for _ in range(samples)]))
+        
+        start = time.perf_counter()
+        face_service.train_model()
+        train_seconds = time.perf_counter() - start
+        model_bytes = os.path.getsize(face_service.trainer_path)
+        
+        # Cold load, as a freshly started worker process would do it
+        loader = FaceRecognitionService(compute_pool=False)
+        start = time.perf_counter()
+        engine = loader.load_model()
+        load_seconds = time.perf_counter() - start
+        
+        truth = rng.integers(1, identities + 1, size=queries)
+        probes = [render_face(people[face_id - 1], rng) for face_id in truth]
+        timings, correct = [], 0
+        for face_id, probe in zip(truth, probes):
+            start = time.perf_counter()
+            predicted, _ = engine.predict(probe)
+            timings.append(time.perf_counter() - start)
+            correct += int(predicted == face_id)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        'engine': engine_name,
+        'identities': identities,
+        'samples': identities * samples,
+        'train_seconds': round(train_seconds, 4),
+        'model_bytes': model_bytes,
+        'load_seconds': round(load_seconds, 4),
+        'predict_p50_ms': percentile_ms(timings, 50),
+        'predict_p99_ms': percentile_ms(timings, 99),
+        'accuracy': round(correct / queries, 4)
+    }
+
+
+def run_suite(identity_counts, engines, samples, queries, seed):
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'cpus': os.cpu_count(),
+            'search_mode': Config.FACE_SEARCH_MODE
+        },
+        'samples_per_identity': samples,
+        'queries': queries,
+        'runs': []
+    }
+    
+    for engine_name in engines:
+        for identities in identity_counts:
+            print(f"⏳ {engine_name}: {identities} identities x {samples} samples...", file=sys.stderr)
+            run = benchmark_engine(engine_name, identities, samples, queries, seed)
+            results['runs'].append(run)
+            print(f"✅ {engine_name:<5} {identities:>6} ids  train {run['train_seconds']:.3f}s  "
+                  f"model {run['model_bytes'] / 1e6:.1f} MB  load {run['load_seconds']:.3f}s  "
+                  f"predict p50 {run['predict_p50_ms']} ms p99 {run['predict_p99_ms']} ms  "
+                  f"accuracy {run['accuracy']:.3f}", file=sys.stderr)
+    
+    return results
+
+
+def check_index_speed(results, tolerance=INDEX_SPEED_TOLERANCE):
+    """Check the index engine predicts no slower than LBPH at every enrollment size both were run at"""
+    p50 = {(run['engine'], run['identities']): run['predict_p50_ms'] for run in results['runs']}
+    ok = True
+    for (engine_name, identities), lbph_ms in sorted(p50.items()):
+        if engine_name != 'lbph' or ('index', identities) not in p50:
+            continue
+        index_ms = p50[('index', identities)]
+        if index_ms > lbph_ms * tolerance:
+            ok = False
+            print(f"❌ index is slower than lbph at {identities} identities: "
+                  f"p50 {index_ms} ms vs {lbph_ms} ms", file=sys.stderr)
+        else:
+            print(f"✅ index keeps up with lbph at {identities} identities: "
+                  f"p50 {index_ms} ms vs {lbph_ms} ms", file=sys.stderr)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Face model training/recognition benchmark on synthetic faces")
+    parser.add_argument('--identities', default='10,100,1000,10000', help="comma-separated enrollment sizes")
+    parser.add_argument('--engines', default='lbph,index', help="comma-separated engines to benchmark")
+    parser.add_argument('--samples', type=int, default=5, help="samples per identity")
+    parser.add_argument('--queries', type=int, default=200, help="predictions timed per run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    
+    # The service reports training and loading with print(); keep stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_suite(
+            [int(value) for value in args.identities.split(',')],
+            args.engines.split(','),
+            args.samples,
+            args.queries,
+            args.seed
+        )
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+    
+    sys.exit(0 if check_index_speed(results) else 1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark exact vs. coarse-to-fine search on the histogram index engine.
+Builds a synthetic enrollment of LBPH-shaped histograms, then reports
+recall (agreement with the exact scan and with the true identity) and
+per-query latency for each candidates/probes setting.
+
+The configured FACE_SEARCH_CANDIDATES / FACE_SEARCH_PROBES are always
+measured, and the run fails (exit status 1) when their recall against the
+exact scan is below --min-recall.
+
+Usage (from the server directory):
+    python benchmarks/face_search_benchmark.py
+    python benchmarks/face_search_benchmark.py --users 5000 --samples 5 --candidates 10,20,50 --probes 4,8,16
+    python benchmarks/face_search_benchmark.py --min-recall 0.98
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the server directory to the path so we can import the app
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config import Config
+from app.services.face_engines import HistogramIndexEngine, LBPH_GRID_X, LBPH_GRID_Y, LBPH_NEIGHBORS
+
+
+def synthetic_histograms(users, samples, rng, concentration=200.0, cell_area=144):
+    """Per-cell normalized histograms: one Dirichlet prototype per user, noisy samples around it.
+    
+    Each sample counts cell_area pixels per cell (144 for 100x100 faces), so
+    it has the same 1 / cell_area granularity as a real LBPH histogram.
+    """
+    cells, patterns = LBPH_GRID_X * LBPH_GRID_Y, 2 ** LBPH_NEIGHBORS
+    
+    # Skewed pattern popularity, like the uniform-pattern peaks of real LBP histograms
+    popularity = rng.pareto(1.5, patterns) + 0.05
+    
+    def sample_around(prototype):
+        draw = rng.gamma(prototype * concentration + 1e-3)
+        counts = rng.multinomial(cell_area, draw / draw.sum(axis=1, keepdims=True))
+        return (counts / cell_area).astype(np.float32).ravel()
+    
+    prototypes = [rng.dirichlet(popularity, size=cells) for _ in range(users)]
+    histograms = np.empty((users * samples, cells * patterns), dtype=np.float32)
+    labels = np.repeat(np.arange(1, users + 1, dtype=np.int32), samples)
+    for row in range(len(histograms)):
+        histograms[row] = sample_around(prototypes[row // samples])
+    return histograms, labels, prototypes, sample_around
+
+
+def percentile_ms(timings, q):
+    return round(float(np.percentile(timings, q)) * 1000, 3)
+
+
+def run_queries(engine, probes):
+    """Predict every probe, returning labels and per-query latencies"""
+    labels, timings = [], []
+    for probe in probes:
+        start = time.perf_counter()
+        label, _ = engine.predict_histogram(probe)
+        timings.append(time.perf_counter() - start)
+        labels.append(label)
+    return np.array(labels), timings
+
+
+def benchmark(users, samples, queries, candidates_list, probes_list, seed):
+    rng = np.random.default_rng(seed)
+    
+    print(f"Generating {users} users x {samples} samples...")
+    histograms, labels, prototypes, sample_around = synthetic_histograms(users, samples, rng)
+    truth = rng.integers(1, users + 1, size=queries)
+    probes = [sample_around(prototypes[label - 1]) for label in truth]
+    
+    engine = HistogramIndexEngine(search='exact', coarse_min_rows=0)
+    engine.add_histograms(histograms, labels)
+    del histograms
+    
+    exact_labels, exact_timings = run_queries(engine, probes)
+    results = {
+        'users': users,
+        'samples_per_user': samples,
+        'rows': len(labels),
+        'queries': queries,
+        'exact': {
+            'accuracy': float((exact_labels == truth).mean()),
+            'p50_ms': percentile_ms(exact_timings, 50),
+            'p99_ms': percentile_ms(exact_timings, 99)
+        },
+        'coarse': []
+    }
+    print(f"exact: accuracy {results['exact']['accuracy']:.3f}, "
+          f"p50 {results['exact']['p50_ms']} ms, p99 {results['exact']['p99_ms']} ms")
+    
+    start = time.perf_counter()
+    engine.fit_coarse()
+    fit_seconds = time.perf_counter() - start
+    results['coarse_fit_seconds'] = round(fit_seconds, 3)
+    results['coarse_cells'] = len(engine._coarse.centroids)
+    print(f"coarse index: {results['coarse_cells']} cells fitted in {fit_seconds:.2f}s")
+    
+    engine.search = 'coarse'
+    for probes_count in probes_list:
+        for candidates in candidates_list:
+            engine.probes, engine.candidates = probes_count, candidates
+            coarse_labels, timings = run_queries(engine, probes)
+            row = {
+                'probes': probes_count,
+                'candidates': candidates,
+                'recall_vs_exact': float((coarse_labels == exact_labels).mean()),
+                'accuracy': float((coarse_labels == truth).mean()),
+                'p50_ms': percentile_ms(timings, 50),
+                'p99_ms': percentile_ms(timings, 99)
+            }
+            results['coarse'].append(row)
+            print(f"coarse probes={probes_count:<3} candidates={candidates:<4} "
+                  f"recall {row['recall_vs_exact']:.3f}, accuracy {row['accuracy']:.3f}, "
+                  f"p50 {row['p50_ms']} ms, p99 {row['p99_ms']} ms")
+    
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs. latency of coarse-to-fine face search")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--samples', type=int, default=5, help="samples per user")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--candidates', default='5,10,20,50', help="comma-separated candidate user counts")
+    parser.add_argument('--probes', default='8,16,32', help="comma-separated cell probe counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-recall', type=float, default=0.95,
+                        help="recall against the exact scan the configured defaults must reach")
+    parser.add_argument('--json', help="also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    defaults = {'candidates': Config.FACE_SEARCH_CANDIDATES, 'probes': Config.FACE_SEARCH_PROBES}
+    candidates_list = sorted({int(value) for value in args.candidates.split(',')} | {defaults['candidates']})
+    probes_list = sorted({int(value) for value in args.probes.split(',')} | {defaults['probes']})
+    
+    results = benchmark(args.users, args.samples, args.queries, candidates_list, probes_list, args.seed)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    
+    recall = next(row['recall_vs_exact'] for row in results['coarse']
+                  if row['candidates'] == defaults['candidates'] and row['probes'] == defaults['probes'])
+    if recall < args.min_recall:
+        print(f"❌ Default coarse search (probes={defaults['probes']}, candidates={defaults['candidates']}) "
+              f"recall {recall:.3f} is below the {args.min_recall:.2f} target")
+        sys.exit(1)
+    print(f"✅ Default coarse search (probes={defaults['probes']}, candidates={defaults['candidates']}) "
+          f"recall {recall:.3f} meets the {args.min_recall:.2f} target")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Script to enroll faces for many existing users at once.
+Expects one directory per user, named by the user's id or email, holding that
+user's face images. Images are decoded and detected in a process pool, the
+sharpest distinct samples are written to the sample store, face IDs are
+assigned in bulk and the face model is rebuilt once at the end.
+
+Usage:
+    python bulk_enroll_faces.py /path/to/faces
+    python bulk_enroll_faces.py /path/to/faces --workers 8 --skip-enrolled
+
+Layout:
+    /path/to/faces/<user id or email>/<any name>.jpg|.jpeg|.png
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+try:
+    from config import Config
+    from app.models.user_model import User
+    from app.services.face_compute import init_compute_worker, extract_sample_task
+    from app.services.face_quality import select_samples
+    from app.services.face_recognition_service import FaceRecognitionService
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    print("Make sure you're running this script from the server directory")
+    sys.exit(1)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def scan_images(root):
+    """Map each user directory name to its sorted image paths"""
+    users = {}
+    for name in sorted(os.listdir(root)):
+        user_dir = os.path.join(root, name)
+        if not os.path.isdir(user_dir):
+            continue
+        images = [os.path.join(user_dir, f) for f in sorted(os.listdir(user_dir))
+                  if f.lower().endswith(IMAGE_EXTENSIONS)]
+        if images:
+            users[name] = images
+    return users
+
+
+def resolve_users(names):
+    """Look up all users in one query; returns directory name -> user document"""
+    ids = [ObjectId(name) for name in names if ObjectId.is_valid(name)]
+    emails = [name for name in names if not ObjectId.is_valid(name)]
+    
+    resolved = {}
+    for user in User.get_collection().find({'$or': [{'_id': {'$in': ids}}, {'email': {'$in': emails}}]}):
+        resolved[str(user['_id'])] = user
+        if user.get('email'):
+            resolved[user['email']] = user
+    return {name: resolved[name] for name in names if name in resolved}
+
+
+def extract_file(path):
+    """Pool task: read one image file and detect its face -> (face_img, face_box, error)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return None, None, str(e)
+    result, _ = extract_sample_task(data)
+    return result
+
+
+def assign_face_ids(users):
+    """Give every user without a face_id a new one from the shared counter, in a single bulk write"""
+    new_users = [user for user in users if not user.get('face_id')]
+    if not new_users:
+        return 0
+    
+    collection = User.get_collection()
+    first_id = User.reserve_face_ids(len(new_users))
+    updates = [
+        UpdateOne({'_id': user['_id'], 'face_id': {'$not': {'$gt': 0}}}, {'$set': {'face_id': first_id + offset}})
+        for offset, user in enumerate(new_users)
+    ]
+    try:
+        collection.bulk_write(updates, ordered=False)
+    except BulkWriteError as e:
+        # IDs already taken outside the counter: claim those users' IDs one at a time
+        User.sync_face_id_counter()
+        for error in e.details['writeErrors']:
+            if error['code'] != 11000:
+                raise
+            User.claim_face_id(new_users[error['index']]['_id'])
+    User.invalidate_cache(*(user['_id'] for user in new_users))
+    
+    # Read back the stored IDs, since a concurrent registration may have claimed one first
+    stored = collection.find({'_id': {'$in': [user['_id'] for user in new_users]}}, {'face_id': 1})
+    face_ids = {doc['_id']: doc.get('face_id') for doc in stored}
+    for user in new_users:
+        user['face_id'] = face_ids.get(user['_id'])
+    return len(new_users)
+
+
+def bulk_enroll(root, workers, skip_enrolled=False):
+    """Enroll every user directory under root and rebuild the model once"""
+    started = time.perf_counter()
+    face_service = FaceRecognitionService(compute_pool=False)
+    
+    # Find users
+    images_by_name = scan_images(root)
+    if not images_by_name:
+        print(f"❌ No user image directories found in {root}")
+        return False
+    
+    users = resolve_users(list(images_by_name))
+    for name in images_by_name:
+        if name not in users:
+            print(f"❌ Skipping {name}: no matching user")
+    
+    if skip_enrolled:
+        for name in list(users):
+            face_id = users[name].get('face_id')
+            if face_id and face_service.samples.has(face_id):
+                print(f"⏭️ Skipping {name}: already enrolled")
+                del users[name]
+    
+    if not users:
+        print("❌ No users to enroll")
+        return False
+    
+    # Decode and detect every image in parallel
+    jobs = [(name, path) for name in users for path in images_by_name[name]]
+    print(f"🔍 Detecting faces in {len(jobs)} images for {len(users)} users with {workers} workers...")
+    
+    detect_started = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_compute_worker) as pool:
+        extracted = pool.map(extract_file, [path for _, path in jobs], chunksize=16)
+    detect_seconds = time.perf_counter() - detect_started
+    
+    faces_by_name = {}
+    failed_images = 0
+    for (name, path), (face_img, _, error) in zip(jobs, extracted):
+        if error:
+            failed_images += 1
+            continue
+        faces_by_name.setdefault(name, []).append(face_img)
+    
+    # Keep the sharpest distinct samples of each user
+    enrolled = []
+    for name, user in users.items():
+        faces = faces_by_name.get(name, [])
+        scores = select_samples(
+            faces,
+            keep=Config.FACE_SAMPLE_KEEP,
+            duplicate_bits=Config.FACE_SAMPLE_DUPLICATE_BITS,
+            min_sharpness=Config.FACE_SAMPLE_MIN_SHARPNESS
+        )
+        selected = [face for face, score in zip(faces, scores) if score['selected']]
+        if len(selected) < 3:
+            print(f"❌ Skipping {name}: only {len(selected)} valid face samples found. Minimum 3 required.")
+            continue
+        enrolled.append((user, np.stack(selected)))
+    
+    if not enrolled:
+        print("❌ No users had enough valid face samples")
+        return False
+    
+    # Assign face IDs and write samples
+    assigned = assign_face_ids([user for user, _ in enrolled])
+    sample_count = 0
+    for user, samples in enrolled:
+        face_service.samples.save(user['face_id'], samples)
+        sample_count += len(samples)
+    
+    # Build the model once
+    train_started = time.perf_counter()
+    try:
+        face_service.train_model()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    train_seconds = time.perf_counter() - train_started
+    total_seconds = time.perf_counter() - started
+    
+    print("\n" + "="*50)
+    print("📊 BULK ENROLLMENT SUMMARY:")
+    print("="*50)
+    print(f"👤 Users enrolled: {len(enrolled)} ({assigned} new face IDs)")
+    print(f"🖼️ Images: {len(jobs)} processed, {failed_images} without a usable face")
+    print(f"💾 Samples stored: {sample_count}")
+    print(f"⚡ Detection: {detect_seconds:.2f}s ({len(jobs) / max(detect_seconds, 1e-9):.1f} images/s)")
+    print(f"🧠 Training: {train_seconds:.2f}s")
+    print(f"⏱️ Total: {total_seconds:.2f}s ({len(enrolled) / max(total_seconds, 1e-9):.1f} users/s)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enroll faces for many users and rebuild the model once")
+    parser.add_argument('root', help="directory with one sub-directory of images per user (named by id or email)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="detection worker processes")
+    parser.add_argument('--skip-enrolled', action='store_true', help="leave users that already have face samples untouched")
+    args = parser.parse_args()
+    
+    print("🚀 BOTIBOT BULK FACE ENROLLMENT")
+    print("="*50)
+    
+    ok = bulk_enroll(args.root, max(1, args.workers), skip_enrolled=args.skip_enrolled)
+    sys.exit(0 if ok else 1)
@@ -6,13 +6,128 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'ondababythebest')
     MONGO_URI = os.getenv('MONGO_URI')
+    
+    # MongoClient connection pool; a wait queue timeout of 0 waits for a free connection indefinitely
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '100'))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000'))
+    
+    # Comma-separated wire compressors to offer the server, e.g. 'zstd,snappy,zlib' (zstd/snappy need extra packages)
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')
+    
+    # Create the indexes declared on the models at startup and warn about hot queries that scan a collection
+    MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() in ('1', 'true', 'yes')
     JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION', '12').replace('H', '')) 
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'botibot_secret_key_2025')
+    
+    # Threads that run pbkdf2 password hashing/verification; 0 hashes on the request thread
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+    
+    # Hashes allowed to wait for a thread before login/register get 503, and the Retry-After sent with it
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '16'))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '1'))
+    
+    # Token-bucket admission before any hashing: attempts per minute and burst size; a rate of 0 disables it
+    LOGIN_EMAIL_RATE = float(os.getenv('LOGIN_EMAIL_RATE', '5'))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', '5'))
+    LOGIN_IP_RATE = float(os.getenv('LOGIN_IP_RATE', '30'))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', '20'))
+    
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto are trusted; 0 uses the socket peer address
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    
+    # Verified token claims memoized per token digest (evicted at the token's exp at the latest); a TTL of 0 disables it
+    JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', '4096'))
+    JWT_CACHE_TTL = float(os.getenv('JWT_CACHE_TTL', '300'))
+    
+    # Face recognition engine: 'index' (vectorized NumPy histogram index, updated incrementally) or
+    # 'lbph' (OpenCV, retrained on every change); both give the same face_id and confidence
+    FACE_ENGINE = os.getenv('FACE_ENGINE', 'index')
+    
+    # Trained model file; defaults to face_trainer.yml (lbph) or the binary face_model.npz (index)
+    FACE_MODEL_PATH = os.getenv('FACE_MODEL_PATH')
+    
+    # Map the binary model's histograms read-only so all worker processes share one copy (index engine).
+    # Not on Windows, where an open mapping blocks the os.replace() that publishes a new model.
+    FACE_MODEL_MMAP = os.name != 'nt' and os.getenv('FACE_MODEL_MMAP', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Longest side (px) face images are decoded to before detection; 0 decodes full resolution
+    FACE_DECODE_MAX_DIM = int(os.getenv('FACE_DECODE_MAX_DIM', '640'))
+    
+    # Threads used to decode/detect registration samples in parallel
+    FACE_SAMPLE_WORKERS = int(os.getenv('FACE_SAMPLE_WORKERS', str(min(8, os.cpu_count() or 1))))
+    
+    # Directory where background face job statuses are shared between worker processes
+    FACE_JOBS_PATH = os.getenv('FACE_JOBS_PATH', 'face_jobs')
+    
+    # Index engine search: 'exact' scans every row, 'coarse' re-ranks the nearest users from a PCA/k-means cell index
+    FACE_SEARCH_MODE = os.getenv('FACE_SEARCH_MODE', 'exact')
+    
+    # Coarse search: users re-ranked with exact chi-square, and cells visited per query.
+    # The defaults keep recall against the exact scan at 0.95 or better in
+    # benchmarks/face_search_benchmark.py, which fails below that target
+    FACE_SEARCH_CANDIDATES = int(os.getenv('FACE_SEARCH_CANDIDATES', '10'))
+    FACE_SEARCH_PROBES = int(os.getenv('FACE_SEARCH_PROBES', '32'))
+    
+    # Batch recognition stops once one face_id has matched this many frames
+    FACE_BATCH_MIN_VOTES = int(os.getenv('FACE_BATCH_MIN_VOTES', '2'))
+    
+    # Where normalized face samples are kept: 'file' (one array file per user in face_dataset) or 'gridfs'
+    FACE_SAMPLE_STORE = os.getenv('FACE_SAMPLE_STORE', 'file')
+    
+    # Enrollment keeps at most this many of the sharpest distinct samples per user (registration needs 3)
+    FACE_SAMPLE_KEEP = int(os.getenv('FACE_SAMPLE_KEEP', '10'))
+    if FACE_SAMPLE_KEEP < 3:
+        raise ValueError(f"FACE_SAMPLE_KEEP must be at least 3, the number of samples a registration needs; got {FACE_SAMPLE_KEEP}")
+    
+    # dHash bit distance at or below which two samples count as near-duplicates
+    FACE_SAMPLE_DUPLICATE_BITS = int(os.getenv('FACE_SAMPLE_DUPLICATE_BITS', '4'))
+    
+    # Variance-of-Laplacian below which a sample is rejected as blurred (0 disables)
+    FACE_SAMPLE_MIN_SHARPNESS = float(os.getenv('FACE_SAMPLE_MIN_SHARPNESS', '0'))
+    
+    # Worker processes for face decode/detection on the whole host, split evenly between the
+    # WEB_CONCURRENCY server processes (at least one each); 0 keeps that work on request threads
+    FACE_COMPUTE_WORKERS = int(os.getenv('FACE_COMPUTE_WORKERS', str(min(4, os.cpu_count() or 1))))
+    
+    # Server worker processes on the host (gunicorn reads the same variable for its --workers default)
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+    
+    # Face tasks allowed to wait for a worker before requests get 503 (a registration queues one per image)
+    FACE_COMPUTE_QUEUE = int(os.getenv('FACE_COMPUTE_QUEUE', '64'))
+    
+    # Retry-After seconds sent with 503 when the face compute queue is full
+    FACE_COMPUTE_RETRY_AFTER = int(os.getenv('FACE_COMPUTE_RETRY_AFTER', '2'))
+    
+    # How compute workers are started; 'spawn' avoids forking a threaded server
+    FACE_COMPUTE_START_METHOD = os.getenv('FACE_COMPUTE_START_METHOD', 'spawn')
+    
+    # Recognition results cached per (image content, model version); a TTL of 0 disables the cache
+    FACE_RESULT_CACHE_SIZE = int(os.getenv('FACE_RESULT_CACHE_SIZE', '256'))
+    FACE_RESULT_CACHE_TTL = float(os.getenv('FACE_RESULT_CACHE_TTL', '5'))
+    
+    # Authenticated user documents cached per user id; a TTL of 0 disables the cache
+    AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+    AUTH_USER_CACHE_TTL = float(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+    
+    # Bearer token a metrics scraper must send to read /api/metrics; the endpoint is disabled while unset
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
+    # Add a Server-Timing header with per-stage durations to face API responses
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() in ('1', 'true', 'yes')
     
 class DevelopmentConfig(Config):
     DEBUG = True
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '10'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
     
 class ProductionConfig(Config):
     DEBUG = False
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '5'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zlib')
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1'))
 
 config = {
     'development': DevelopmentConfig,
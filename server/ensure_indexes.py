@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script to create the MongoDB indexes declared on the models.
+Creating an index that already exists is a no-op, so this is safe to run on
+every deploy. The hot queries are then explained and any that would still
+scan a whole collection are reported.
+
+Usage:
+    python ensure_indexes.py
+    python ensure_indexes.py --check-only
+"""
+
+import argparse
+import sys
+
+try:
+    from app.utils.db_connection import db_instance
+    from app.models.indexes import ensure_indexes, check_query_plans
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    print("Make sure you're running this script from the server directory")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the declared MongoDB indexes and verify query plans")
+    parser.add_argument('--check-only', action='store_true', help="only explain the hot queries, create nothing")
+    args = parser.parse_args()
+    
+    db_instance.connect()
+    failures = 0 if args.check_only else ensure_indexes()
+    scans = check_query_plans()
+    if not scans:
+        print("✅ No hot query scans a whole collection")
+    
+    db_instance.close_connection()
+    sys.exit(0 if not failures and not scans else 1)
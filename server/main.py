@@ -1,25 +1,43 @@
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import config
 from app.utils.db_connection import db_instance
+from app.models.indexes import ensure_indexes, check_query_plans
 import os
 from app.routes.auth_routes import auth_bp
 from app.routes.schedule_routes import schedule_bp
+from app.routes.face_routes import face_bp
+from app.routes.metrics_routes import metrics_bp
 
 def create_app(config_name=None):
     """Application factory"""
     app = Flask(__name__)
     
     config_name = config_name or os.getenv('FLASK_ENV', 'development')
-    app.config.from_object(config[config_name])
+    settings = config[config_name]
+    app.config.from_object(settings)
+    
+    # Behind a reverse proxy remote_addr is the proxy's; take the client address from the trusted hops
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     CORS(app)
 
     with app.app_context():
-        db_instance.connect()
+        db_instance.connect(settings)
+        if settings.MONGO_ENSURE_INDEXES:
+            try:
+                ensure_indexes()
+                check_query_plans()
+            except Exception as e:
+                print(f"❌ Failed to verify MongoDB indexes: {e}")
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(schedule_bp)
+    app.register_blueprint(face_bp)
+    app.register_blueprint(metrics_bp)
     
     return app
 
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the face recognition model from every sample in face_dataset.
+Face registration only folds the new user's samples into the existing model,
+so run this as a maintenance step after editing the dataset by hand.
+
+Usage:
+    python rebuild_face_model.py
+    python rebuild_face_model.py --convert face_trainer.yml face_model.npz
+"""
+
+import argparse
+import sys
+
+from app.services.face_engines import convert_yaml_model
+from app.services.face_recognition_service import FaceRecognitionService
+
+
+def rebuild_model():
+    """Retrain the face model from scratch"""
+    # Not the shared service: get_face_service() would also queue a background rebuild
+    face_service = FaceRecognitionService(compute_pool=False)
+    
+    if not face_service.has_registered_faces():
+        print("❌ No registered faces found in the dataset")
+        return False
+    
+    try:
+        face_service.train_model()
+        print(f"✅ Face model rebuilt at {face_service.trainer_path}")
+        return True
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+
+def convert_model(yaml_path, npz_path):
+    """Convert an OpenCV YAML trainer file to the binary model format"""
+    try:
+        samples = convert_yaml_model(yaml_path, npz_path)
+        print(f"✅ Converted {yaml_path} to {npz_path} ({samples} samples)")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to convert {yaml_path}: {e}")
+        print("   Run without --convert to rebuild the model from the stored face samples instead")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or convert the face recognition model")
+    parser.add_argument('--convert', nargs=2, metavar=('YAML_PATH', 'NPZ_PATH'),
+                        help="convert an existing YAML trainer file instead of retraining")
+    args = parser.parse_args()
+    
+    if args.convert:
+        ok = convert_model(*args.convert)
+    else:
+        ok = rebuild_model()
+    sys.exit(0 if ok else 1)
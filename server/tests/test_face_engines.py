@@ -0,0 +1,169 @@
+import cv2
+import numpy as np
+import pytest
+from config import Config
+from app.services.face_engines import convert_yaml_model, read_binary_model, HistogramIndexEngine, LBPHEngine
+
+
+def random_faces(count, sizes, seed=0):
+    """Textured grayscale crops, one per requested (square) size"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (size, size), dtype=np.uint8) for size in np.resize(sizes, count)]
+
+
+def train_yaml(path, faces, labels):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(faces, np.asarray(labels, dtype=np.int32))
+    recognizer.save(str(path))
+    return recognizer
+
+
+def test_index_engine_matches_lbph(tmp_path):
+    faces = random_faces(12, [100])
+    labels = np.repeat([1, 2, 3], 4)
+    lbph, index = LBPHEngine(), HistogramIndexEngine()
+    for engine in (lbph, index):
+        engine.train(faces[:8], labels[:8])
+        engine.update(faces[8:], labels[8:])
+    
+    for probe in random_faces(4, [100], seed=1) + faces[::4]:
+        label, confidence = index.predict(probe)
+        expected_label, expected_confidence = lbph.predict(probe)
+        assert label == expected_label
+        assert confidence == pytest.approx(expected_confidence, rel=1e-4)
+        for claimed in (1, 3):
+            assert index.verify(probe, claimed) == pytest.approx(lbph.verify(probe, claimed), rel=1e-4)
+    assert index.verify(faces[0], 9) is None and lbph.verify(faces[0], 9) is None
+    
+    # The index engine's YAML layout is the one LBPH reads
+    index.save(str(tmp_path / 'face_trainer.yml'))
+    reloaded = LBPHEngine()
+    reloaded.load(str(tmp_path / 'face_trainer.yml'))
+    assert reloaded.predict(faces[5]) == pytest.approx(lbph.predict(faces[5]), rel=1e-4)
+
+
+def test_mapped_model_round_trip_and_append(tmp_path):
+    faces = random_faces(12, [100])
+    engine = HistogramIndexEngine()
+    engine.train(faces[:9], np.repeat([1, 2, 3], 3))
+    engine.save(str(tmp_path / 'face_model.npz'))
+    
+    mapped = HistogramIndexEngine(mmap=True)
+    mapped.load(str(tmp_path / 'face_model.npz'))
+    assert mapped.shared and len(mapped) == 9
+    for probe in faces[:9:2] + random_faces(2, [100], seed=1):
+        assert mapped.predict(probe) == engine.predict(probe)
+    
+    # Appending copies the mapping into private memory and leaves the file alone
+    mapped.update(faces[9:], [4, 4, 4])
+    assert not mapped.shared
+    assert mapped.predict(faces[10]) == (4, pytest.approx(0, abs=1e-5))
+    assert mapped.predict(faces[1]) == engine.predict(faces[1])
+    
+    on_disk = HistogramIndexEngine(mmap=True)
+    on_disk.load(str(tmp_path / 'face_model.npz'))
+    assert not on_disk.has_label(4)
+    
+    mapped.save(str(tmp_path / 'face_model.npz'))
+    on_disk.load(str(tmp_path / 'face_model.npz'))
+    assert on_disk.shared and len(on_disk) == 12
+    assert on_disk.predict(faces[10])[0] == 4
+
+
+def test_removed_label_can_be_enrolled_again(tmp_path):
+    faces = random_faces(9, [100])
+    engine = HistogramIndexEngine()
+    engine.train(faces, np.repeat([1, 2, 3], 3))
+    
+    assert engine.remove(2)
+    assert not engine.has_label(2) and len(engine) == 6
+    assert engine.predict(faces[3])[0] != 2
+    assert engine.verify(faces[3], 2) is None
+    
+    new_faces = random_faces(3, [100], seed=7)
+    engine.update(new_faces, [2, 2, 2])
+    assert engine.has_label(2) and len(engine) == 9
+    assert engine.predict(new_faces[0]) == (2, pytest.approx(0, abs=1e-5))
+    assert engine.verify(faces[3], 2) > 0
+    
+    engine.save(str(tmp_path / 'face_model.npz'))
+    reloaded = HistogramIndexEngine()
+    reloaded.load(str(tmp_path / 'face_model.npz'))
+    assert len(reloaded) == 9
+    for probe in faces + new_faces:
+        assert reloaded.predict(probe) == engine.predict(probe)
+
+
+def test_yaml_model_converts_to_the_same_predictions(tmp_path):
+    faces = random_faces(12, [100])
+    labels = np.repeat([1, 2, 3], 4)
+    recognizer = train_yaml(tmp_path / 'face_trainer.yml', faces, labels)
+    
+    assert convert_yaml_model(str(tmp_path / 'face_trainer.yml'), str(tmp_path / 'face_model.npz')) == 12
+    counts, stored_labels, cell_area, _ = read_binary_model(str(tmp_path / 'face_model.npz'))
+    assert cell_area == 144 and counts.dtype == np.uint8
+    
+    engine = HistogramIndexEngine()
+    engine.load(str(tmp_path / 'face_model.npz'))
+    for probe in random_faces(3, [100], seed=1) + faces[:2]:
+        label, confidence = engine.predict(probe)
+        expected_label, expected_confidence = recognizer.predict(probe)
+        assert label == expected_label
+        assert confidence == pytest.approx(expected_confidence, rel=1e-4)
+
+
+def test_yaml_model_of_mixed_crop_sizes_is_rejected(tmp_path):
+    # Legacy models were trained on raw detector crops of whatever size the face had
+    faces = random_faces(6, [180, 220, 260, 300])
+    train_yaml(tmp_path / 'face_trainer.yml', faces, [1, 1, 1, 2, 2, 2])
+    
+    with pytest.raises(ValueError, match='different sizes'):
+        convert_yaml_model(str(tmp_path / 'face_trainer.yml'), str(tmp_path / 'face_model.npz'))
+    assert not (tmp_path / 'face_model.npz').exists()
+    with pytest.raises(ValueError, match='different sizes'):
+        HistogramIndexEngine().load(str(tmp_path / 'face_trainer.yml'))
+    
+    # LBPH still reads it, and verifies against its normalized histograms
+    lbph = LBPHEngine()
+    lbph.load(str(tmp_path / 'face_trainer.yml'))
+    assert lbph.verify(faces[0], 1) == pytest.approx(0, abs=1e-5)
+    assert lbph.verify(faces[0], 2) > 0
+
+
+def test_unconvertible_legacy_model_queues_one_rebuild(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, 'FACE_ENGINE', 'index')
+    monkeypatch.setattr(Config, 'FACE_MODEL_PATH', None)
+    monkeypatch.setattr(Config, 'FACE_SAMPLE_STORE', 'file')
+    train_yaml(tmp_path / 'face_trainer.yml', random_faces(6, [180, 300]), [1, 1, 1, 2, 2, 2])
+    
+    from app.services.face_recognition_service import FaceRecognitionService
+    service = FaceRecognitionService(compute_pool=False)
+    rebuilds = []
+    monkeypatch.setattr(service.trainer, 'request_rebuild', lambda **kwargs: rebuilds.append(kwargs))
+    
+    for _ in range(3):
+        with pytest.raises(ValueError, match='being rebuilt'):
+            service.load_model()
+    assert len(rebuilds) == 1
+    assert (tmp_path / 'face_trainer.yml').exists()
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_engine_copy_leaves_the_original_untouched(tmp_path, mmap):
+    faces = random_faces(9, [100])
+    engine = HistogramIndexEngine()
+    engine.train(faces, np.repeat([1, 2, 3], 3))
+    engine.save(str(tmp_path / 'face_model.npz'))
+    published = HistogramIndexEngine(mmap=mmap)
+    published.load(str(tmp_path / 'face_model.npz'))
+    before = published.predict(faces[0])
+    
+    changed = published.copy()
+    changed.remove(1)
+    changed.update(random_faces(3, [100], seed=5), [4, 4, 4])
+    changed.save(str(tmp_path / 'changed.npz'))
+    
+    assert published.has_label(1) and not published.has_label(4)
+    assert published.predict(faces[0]) == before
+    assert not changed.has_label(1) and changed.has_label(4)
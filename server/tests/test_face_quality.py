@@ -0,0 +1,25 @@
+import cv2
+import numpy as np
+from app.services.face_quality import select_samples, sharpness
+
+
+def textured_faces(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (100, 100), dtype=np.uint8) for _ in range(count)]
+
+
+def test_blurry_crops_are_not_taken_back():
+    faces = [cv2.GaussianBlur(face, (31, 31), 10) for face in textured_faces(5)]
+    assert all(sharpness(face) < 50 for face in faces)
+    
+    scores = select_samples(faces, keep=10, duplicate_bits=0, min_sharpness=50)
+    assert not any(score['selected'] for score in scores)
+    assert all(score['reason'] == 'too blurry' for score in scores)
+
+
+def test_near_duplicates_are_taken_back_to_reach_the_minimum():
+    face = textured_faces(1)[0]
+    faces = [face, face, face]
+    
+    scores = select_samples(faces, keep=10, duplicate_bits=4, minimum=3)
+    assert all(score['selected'] and score['reason'] is None for score in scores)
@@ -0,0 +1,33 @@
+import os
+import numpy as np
+from PIL import Image
+from app.services.face_store import FileSampleStore, legacy_sample_dirs, migrate_legacy_samples, FACE_SIZE
+
+
+def write_legacy_dir(path, face_id, count, extra_files=()):
+    user_dir = path / f"user_{face_id}"
+    user_dir.mkdir()
+    rng = np.random.default_rng(face_id)
+    for i in range(count):
+        Image.fromarray(rng.integers(0, 256, (120, 120), dtype=np.uint8)).save(user_dir / f"{i}.jpg")
+    for filename in extra_files:
+        (user_dir / filename).write_bytes(b'\x00\x01')
+    return user_dir
+
+
+def test_migration_ignores_files_that_are_not_samples(tmp_path):
+    store = FileSampleStore(str(tmp_path))
+    write_legacy_dir(tmp_path, 7, 4, extra_files=['.DS_Store', 'Thumbs.db'])
+    
+    assert migrate_legacy_samples(store) == 1
+    assert store.load(7).shape == (4, FACE_SIZE, FACE_SIZE)
+    assert legacy_sample_dirs(str(tmp_path)) == {}
+
+
+def test_directory_with_an_unreadable_sample_is_kept(tmp_path):
+    store = FileSampleStore(str(tmp_path))
+    user_dir = write_legacy_dir(tmp_path, 8, 3, extra_files=['3.jpg'])
+    
+    assert migrate_legacy_samples(store) == 0
+    assert store.load(8) is None
+    assert sorted(os.listdir(user_dir)) == ['0.jpg', '1.jpg', '2.jpg', '3.jpg']
@@ -0,0 +1,39 @@
+import pytest
+import main
+from config import config
+from app.controllers import auth_controller
+from app.models.user_model import User
+from app.utils.rate_limit import TokenBucketLimiter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Production app behind one trusted proxy, with no database and a two-attempt IP bucket"""
+    monkeypatch.setattr(main.db_instance, 'connect', lambda settings: None)
+    monkeypatch.setattr(config['production'], 'MONGO_ENSURE_INDEXES', False)
+    monkeypatch.setattr(config['production'], 'TRUSTED_PROXY_HOPS', 1)
+    monkeypatch.setattr(auth_controller, 'ip_limiter', TokenBucketLimiter('test.ip', 1, 2))
+    monkeypatch.setattr(auth_controller, 'email_limiter', TokenBucketLimiter('test.email', 0, 0))
+    monkeypatch.setattr(User, 'find_by_email', classmethod(lambda cls, email: None))
+    return main.create_app('production').test_client()
+
+
+def login(client, forwarded_for):
+    return client.post(
+        '/api/auth/login',
+        json={'email': 'someone@example.com', 'password': 'wrong-password'},
+        headers={'X-Forwarded-For': forwarded_for},
+        environ_base={'REMOTE_ADDR': '10.0.0.1'}
+    )
+
+
+def test_clients_behind_the_proxy_have_separate_buckets(client):
+    assert login(client, '203.0.113.7').status_code == 401
+    assert login(client, '203.0.113.7').status_code == 401
+    
+    rejected = login(client, '203.0.113.7')
+    assert rejected.status_code == 429
+    assert int(rejected.headers['Retry-After']) >= 1
+    
+    # Same proxy address, different client: not affected by the first client's bucket
+    assert login(client, '198.51.100.23').status_code == 401